@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from pathlib import Path
+import numpy as np
+import hash_cache
+import find_duplicates
+import list_missing
+import list_same
+import list_same_by_name
+import replace_changed
+from catalog import build_catalog
+
+ANALYSES = ("duplicates", "missing", "identical", "same-name", "changed")
+
+def run_duplicates(scan, args):
+    catalog, parts = scan["catalog"], scan["parts"]
+    for root, part in zip(catalog.roots, parts):
+        print(f"Duplicates in {root}")
+        if args.workers > 1:
+            titles, title_of = find_duplicates.title_table(part)
+            groups = find_duplicates.group_similar_files_parallel(part, titles, title_of, args.threshold, args.workers)
+        else:
+            groups = find_duplicates.group_similar_files(part, args.threshold)
+        find_duplicates.display_duplicates(groups)
+
+def run_missing(scan, args):
+    catalog, parts = scan["catalog"], scan["parts"]
+    missing = list_missing.find_missing(list(parts[0]), list(parts[1]), args.match, args.fuzzy)
+    list_missing.show_missing(missing, catalog.roots[0], catalog.roots[1])
+
+def run_identical(scan, args):
+    groups = list(list_same.find_identical_in_catalog(scan["catalog"]))
+    list_same.show_matches(groups)
+
+def run_same_name(scan, args):
+    catalog, parts = scan["catalog"], scan["parts"]
+    pairs = list_same_by_name.pair_by_name(parts[0], parts[1])
+    list_same_by_name.show_matches(pairs, catalog.roots[0], catalog.roots[1])
+
+def run_changed(scan, args):
+    previous = replace_changed.dry_run
+    replace_changed.dry_run = True
+    try:
+        counts = replace_changed.sync_paths((Path(entry.path) for entry in scan["source"]), Path(scan["catalog"].roots[1]))
+    finally:
+        replace_changed.dry_run = previous
+    replace_changed.print_summary(counts, True)
+
+RUNNERS = {
+    "duplicates": run_duplicates,
+    "missing": run_missing,
+    "identical": run_identical,
+    "same-name": run_same_name,
+    "changed": run_changed,
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan folders once and write several reports from the same catalog")
+    parser.add_argument("roots", nargs="*", help="folders or snapshots; the first is the source, the second the comparison target")
+    parser.add_argument("--config", help="JSON file with defaults for any of these options")
+    parser.add_argument("--run", default=",".join(ANALYSES), help=f"comma separated analyses ({', '.join(ANALYSES)})")
+    parser.add_argument("--reports", default="reports", help="folder the reports are written to")
+    parser.add_argument("--recursive", action="store_true", help="descend into subfolders")
+    parser.add_argument("--threshold", type=float, default=0.92, help="title similarity for duplicates")
+    parser.add_argument("--workers", type=int, default=1, help="processes for duplicate scoring, 0 = all cores")
+    parser.add_argument("--match", default="name", choices=sorted(list_missing.match_modes), help="match key for missing files")
+    parser.add_argument("--fuzzy", type=float, default=None, help="fuzzy title threshold for leftover missing files")
+    args = parser.parse_args(argv)
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+        parser.set_defaults(**{key.replace("-", "_"): value for key, value in config.items()})
+        args = parser.parse_args(argv)
+    if isinstance(args.run, str):
+        args.run = [name.strip() for name in args.run.split(",") if name.strip()]
+    unknown = [name for name in args.run if name not in RUNNERS]
+    if unknown:
+        parser.error(f"unknown analyses: {', '.join(unknown)}")
+    if not args.roots:
+        parser.error("no folders given")
+    if len(args.roots) < 2 and any(name != "duplicates" for name in args.run):
+        parser.error("comparisons need a second folder")
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    sources = [Path(root).expanduser() for root in args.roots]
+    for source in sources:
+        if not source.exists():
+            print(f"Error: Folder not found: {source}")
+            sys.exit(1)
+    started = time.monotonic()
+    deep_source = "changed" in args.run and not args.recursive
+    catalog = build_catalog(sources, [args.recursive or (deep_source and idx == 0) for idx in range(len(sources))])
+    source = catalog.subset(catalog.root_indexes(0))
+    if deep_source:
+        catalog = catalog.subset(np.concatenate([catalog.top_level_indexes(0)] + [catalog.root_indexes(idx) for idx in range(1, len(sources))]))
+    parts = [catalog.subset(catalog.root_indexes(idx)) for idx in range(len(sources))]
+    scan = {"catalog": catalog, "parts": parts, "source": source}
+    print(f"Scanned {len(catalog)} files in {len(sources)} folders in {time.monotonic() - started:.1f}s")
+    os.makedirs(args.reports, exist_ok=True)
+    for name in args.run:
+        report_path = os.path.join(args.reports, f"{name}.txt")
+        started = time.monotonic()
+        with open(report_path, "w", encoding="utf-8") as report, contextlib.redirect_stdout(report):
+            RUNNERS[name](scan, args)
+        print(f"Wrote {report_path} in {time.monotonic() - started:.1f}s")
+    for root in catalog.roots:
+        hash_cache.prune(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+from array import array
+import numpy as np
+from scanner import FileEntry
+from snapshot import folder_entries
+
+class FileCatalog:
+    def __init__(self):
+        self.roots = []
+        self.dirs = []
+        self.dir_ids = {}
+        self.names = bytearray()
+        self.name_ends = array("Q")
+        self.parents = array("I")
+        self.root_ids = array("H")
+        self.sizes = array("Q")
+        self.mtimes = array("q")
+        self.inodes = array("Q")
+        self.devs = array("Q")
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        return FileEntry(self.path(idx), self.name(idx), self.sizes[idx], self.mtimes[idx], self.inodes[idx], self.devs[idx])
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def add_root(self, root, entries):
+        root_id = len(self.roots)
+        self.roots.append(os.fspath(root))
+        for entry in entries:
+            self.add(entry, root_id)
+        return root_id
+
+    def add(self, entry, root_id=0):
+        folder = os.path.dirname(entry.path)
+        dir_id = self.dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self.dir_ids[folder] = len(self.dirs)
+            self.dirs.append(folder)
+        self.names += os.fsencode(entry.name)
+        self.name_ends.append(len(self.names))
+        self.parents.append(dir_id)
+        self.root_ids.append(root_id)
+        self.sizes.append(entry.size)
+        self.mtimes.append(entry.mtime_ns)
+        self.inodes.append(entry.inode)
+        self.devs.append(entry.dev)
+
+    def name(self, idx):
+        start = self.name_ends[idx - 1] if idx else 0
+        return os.fsdecode(bytes(self.names[start:self.name_ends[idx]]))
+
+    def path(self, idx):
+        return os.path.join(self.dirs[self.parents[idx]], self.name(idx))
+
+    def stem(self, idx):
+        return os.path.splitext(self.name(idx))[0]
+
+    def entries(self, indexes):
+        return [self[int(idx)] for idx in indexes]
+
+    def subset(self, indexes):
+        part = FileCatalog()
+        part.roots = list(self.roots)
+        for idx in indexes:
+            part.add(self[int(idx)], self.root_ids[int(idx)])
+        return part
+
+    def column(self, name):
+        return np.array(getattr(self, name))
+
+    def root_indexes(self, root_id):
+        return np.flatnonzero(self.column("root_ids") == root_id)
+
+    def top_level_indexes(self, root_id):
+        root = self.roots[root_id]
+        return np.array([idx for idx in self.root_indexes(root_id) if self.dirs[self.parents[idx]] == root], dtype=np.int64)
+
+    def path_order(self):
+        return sorted(range(len(self)), key=lambda idx: (self.dirs[self.parents[idx]], self.name(idx)))
+
+    def size_buckets(self, min_count=2, indexes=None):
+        sizes = self.column("sizes")
+        if indexes is None:
+            indexes = np.arange(len(sizes))
+        order = indexes[np.argsort(sizes[indexes], kind="stable")]
+        ordered = sizes[order]
+        starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+        ends = np.append(starts[1:], len(order))
+        for start, end in zip(starts, ends):
+            if end - start >= min_count:
+                yield int(ordered[start]), order[start:end]
+
+def build_catalog(sources, recursive=False):
+    catalog = FileCatalog()
+    flags = recursive if isinstance(recursive, (list, tuple)) else [recursive] * len(sources)
+    for source, deep in zip(sources, flags):
+        root, entries = folder_entries(source, deep)
+        catalog.add_root(root, entries)
+    return catalog
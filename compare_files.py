@@ -0,0 +1,52 @@
+import os
+import hash_cache
+from digest_engine import new_hasher
+
+FIRST_CHUNK = 16384
+MAX_CHUNK = 1048576
+
+def files_identical(path_a, path_b, st_a=None, st_b=None, algorithm="md5"):
+    st_a = st_a or os.stat(path_a)
+    st_b = st_b or os.stat(path_b)
+    if st_a.st_size != st_b.st_size:
+        return False
+    if (st_a.st_dev, st_a.st_ino) == (st_b.st_dev, st_b.st_ino):
+        return True
+    digest_a = hash_cache.lookup_digest(path_a, algorithm, st_a)
+    digest_b = hash_cache.lookup_digest(path_b, algorithm, st_b)
+    if digest_a is not None and digest_b is not None:
+        return digest_a == digest_b
+    digest = compare_contents(path_a, path_b, st_a.st_size, algorithm)
+    if digest is None:
+        return False
+    hash_cache.store_digest(path_a, algorithm, digest, st_a)
+    hash_cache.store_digest(path_b, algorithm, digest, st_b)
+    return True
+
+def compare_contents(path_a, path_b, size, algorithm="md5"):
+    h = new_hasher(algorithm)
+    buf_size = min(MAX_CHUNK, max(FIRST_CHUNK, size + 1))
+    buf_a = bytearray(buf_size)
+    buf_b = bytearray(buf_size)
+    view_a = memoryview(buf_a)
+    view_b = memoryview(buf_b)
+    chunk = FIRST_CHUNK
+    with open(path_a, "rb", buffering=0) as fa, open(path_b, "rb", buffering=0) as fb:
+        while True:
+            read_a = read_full(fa, view_a[:chunk])
+            read_b = read_full(fb, view_b[:chunk])
+            if read_a != read_b or view_a[:read_a] != view_b[:read_b]:
+                return None
+            if not read_a:
+                return h.hexdigest()
+            h.update(view_a[:read_a])
+            chunk = min(chunk * 2, MAX_CHUNK)
+
+def read_full(f, view):
+    total = 0
+    while total < len(view):
+        count = f.readinto(view[total:])
+        if not count:
+            break
+        total += count
+    return total
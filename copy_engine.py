@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+CHUNK_SIZE = 8388608
+default_workers = 4
+
+def same_filesystem(src, dst):
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    except OSError:
+        return False
+
+def try_reflink(src_fd, dst_fd):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+def kernel_copy(src_fd, dst_fd, size):
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                count = os.copy_file_range(src_fd, dst_fd, min(CHUNK_SIZE, size - copied))
+                if not count:
+                    break
+                copied += count
+            return copied
+        except OSError:
+            if copied:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while copied < size:
+                count = os.sendfile(dst_fd, src_fd, copied, min(CHUNK_SIZE, size - copied))
+                if not count:
+                    break
+                copied += count
+            return copied
+        except OSError:
+            if copied:
+                raise
+    return copied
+
+def copy_contents(src_fd, dst_fd, size):
+    if try_reflink(src_fd, dst_fd):
+        return
+    copied = kernel_copy(src_fd, dst_fd, size)
+    if copied < size:
+        os.lseek(src_fd, copied, os.SEEK_SET)
+        os.lseek(dst_fd, copied, os.SEEK_SET)
+        while True:
+            block = os.read(src_fd, CHUNK_SIZE)
+            if not block:
+                break
+            os.write(dst_fd, block)
+
+def copy_file(src, dst, move=False):
+    src = os.fspath(src)
+    dst = os.fspath(dst)
+    if move and same_filesystem(src, dst):
+        os.replace(src, dst)
+        return
+    folder = os.path.dirname(os.path.abspath(dst))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(dst) + ".", suffix=".partial", dir=folder)
+    try:
+        with open(src, "rb") as fsrc:
+            copy_contents(fsrc.fileno(), fd, os.fstat(fsrc.fileno()).st_size)
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if move:
+        os.unlink(src)
+
+def transfer_all(pairs, workers=None, move=False):
+    pairs = list(pairs)
+    with ThreadPoolExecutor(max_workers=max(1, workers or default_workers)) as pool:
+        futures = [pool.submit(copy_file, src, dst, move) for src, dst in pairs]
+        for (src, dst), future in zip(pairs, futures):
+            try:
+                future.result()
+                yield src, dst, None
+            except Exception as e:
+                yield src, dst, e
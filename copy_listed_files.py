@@ -1,12 +1,18 @@
 import os
-import shutil
 from pathlib import Path
 import unicodedata
+from collections import defaultdict
 import last_folder_helper
+from title_index import cross_candidates
+from title_scoring import pack_titles, batch_similarity
+from copy_engine import transfer_all
+from scanner import scan_files, entry_stem
 
 dry_run = False
 move_not_copy = False
 list_path = 'list.txt'
+match_threshold = 0.92
+closest_threshold = 0.6
 
 def normalize_title(title):
     title = title.strip()
@@ -17,84 +23,77 @@ def normalize_title(title):
     title = ' '.join(title.split())
     return title.strip()
 
-def title_similarity(a, b):
-    if not a or not b:
-        return 0
-    if a == b:
-        return 1.0
-    len_a = len(a)
-    len_b = len(b)
-    if abs(len_a - len_b) > 3:
-        return 0.0
-    distance = 0
-    i = j = 0
-    while i < len_a and j < len_b:
-        if a[i] == b[j]:
-            i += 1
-            j += 1
-        else:
-            distance += 1
-            if len_a > len_b:
-                i += 1
-            elif len_b > len_a:
-                j += 1
-            else:
-                i += 1
-                j += 1
-            if distance > 3:
-                return 0.0
-    distance += abs(len_a - i) + abs(len_b - j)
-    max_len = max(len_a, len_b)
-    similarity = 1.0 - (distance / max_len)
-    return similarity if similarity > 0 else 0.0
-
 def load_wanted_titles(list_path):
     with open(list_path, encoding='utf-8', errors='replace') as f:
         return [line.strip() for line in f if line.strip()]
 
-def find_best_match(wanted, source_path):
-    norm_wanted = normalize_title(wanted)
-    best_match = None
-    best_score = 0.0
-    for file in source_path.iterdir():
-        if not file.is_file():
+def scan_source(source_path):
+    entries = list(scan_files(source_path))
+    return [Path(e.path) for e in entries], [normalize_title(entry_stem(e)) for e in entries]
+
+def match_titles(wanted_titles, files, norms):
+    norm_wanted = [normalize_title(w) for w in wanted_titles]
+    rows_by_wanted = defaultdict(list)
+    for wanted_idx, file_idx in cross_candidates(norm_wanted, norms, closest_threshold):
+        rows_by_wanted[wanted_idx].append(file_idx)
+    packed = pack_titles(norms)
+    scored = defaultdict(list)
+    for wanted_idx, rows in rows_by_wanted.items():
+        scores = batch_similarity(norm_wanted[wanted_idx], packed, rows)
+        options = [(float(score), file_idx) for score, file_idx in zip(scores, rows) if score > 0]
+        if options:
+            scored[wanted_idx] = options
+    closest = {}
+    candidates = []
+    for wanted_idx, options in scored.items():
+        options.sort(key=lambda item: (-item[0], item[1]))
+        closest[wanted_idx] = options[0]
+        candidates.extend((score, wanted_idx, file_idx) for score, file_idx in options if score >= match_threshold)
+    candidates.sort(key=lambda item: (-item[0], item[1], item[2]))
+    assigned = {}
+    claimed = set()
+    for score, wanted_idx, file_idx in candidates:
+        if wanted_idx in assigned or file_idx in claimed:
             continue
-        norm_file = normalize_title(file.stem)
-        score = title_similarity(norm_wanted, norm_file)
-        if score > best_score:
-            best_score = score
-            best_match = file
-    return best_match, best_score
+        assigned[wanted_idx] = (files[file_idx], score)
+        claimed.add(file_idx)
+    results = []
+    for wanted_idx in range(len(wanted_titles)):
+        best_score, best_idx = closest.get(wanted_idx, (0.0, None))
+        best_file = files[best_idx] if best_idx is not None else None
+        match, match_score = assigned.get(wanted_idx, (None, 0.0))
+        results.append((match, match_score, best_file, best_score))
+    return results
 
-def transfer_file(src, target_path):
-    if move_not_copy:
-        shutil.move(src, target_path / src.name)
-    else:
-        shutil.copy2(src, target_path / src.name)
+def transfer_matches(matches, target_path):
+    if dry_run:
+        return {}
+    pairs = [(match, target_path / match.name) for match in matches]
+    return {src: error for src, dst, error in transfer_all(pairs, move=move_not_copy) if error}
 
 def process_titles(wanted_titles, source_path, target_path):
     found_count = 0
     not_found = []
-    for wanted in wanted_titles:
+    files, norms = scan_source(source_path)
+    results = match_titles(wanted_titles, files, norms)
+    errors = transfer_matches([match for match, _, _, _ in results if match], target_path)
+    for wanted, (match, score, closest, closest_score) in zip(wanted_titles, results):
         if not normalize_title(wanted):
             continue
-        best_match, best_score = find_best_match(wanted, source_path)
-        if best_score >= 0.92 and best_match:
-            try:
-                if not dry_run:
-                    transfer_file(best_match, target_path)
-                print(f"✓  {wanted}")
-                print(f"   → found as: {best_match.name}")
-                print(f"   (similarity: {best_score:.3f})")
-                found_count += 1
-            except Exception as e:
+        if match:
+            if match in errors:
                 print(f"✗  {wanted}")
-                print(f"   Copy/move failed: {e}")
+                print(f"   Copy/move failed: {errors[match]}")
                 not_found.append(wanted)
+                continue
+            print(f"✓  {wanted}")
+            print(f"   → found as: {match.name}")
+            print(f"   (similarity: {score:.3f})")
+            found_count += 1
         else:
             print(f"✗  {wanted}")
-            if best_score > 0.6 and best_match:
-                print(f"   Closest was: {best_match.name} ({best_score:.3f})")
+            if closest_score > closest_threshold and closest:
+                print(f"   Closest was: {closest.name} ({closest_score:.3f})")
             not_found.append(wanted)
     return found_count, not_found
 
@@ -1,54 +1,21 @@
-import time
 import random
-import subprocess
 from pathlib import Path
-import urllib.parse
-from settings import mtp_base, COPY_DELAY
+from settings import COPY_DELAY
+from device_manifest import DeviceManifest, load_device_manifest
+from transport import GioTransport
+from transfer_scheduler import RateController, new_stats, send_files, print_stats
 
-def run_gio(cmd):
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"gio command failed: {' '.join(cmd)}\nError: {result.stderr.strip()}")
-    return result.stdout.strip()
-
-def list_remote_files():
-    out = run_gio(["gio", "list", "-l", mtp_base])
-    files_by_name = {}
-    skipped_count = 0
-    for raw in out.splitlines():
-        line = raw.rstrip("\n")
-        if not line:
-            continue
-        tab_parts = line.split("\t")
-        if len(tab_parts) >= 2 and tab_parts[1].isdigit():
-            name_encoded = tab_parts[0]
-            size = int(tab_parts[1])
-            decoded_name = urllib.parse.unquote(name_encoded)
-            if decoded_name.lower().endswith(('.epub', '.pdf')):
-                files_by_name[decoded_name] = size
-            continue
-        space_parts = line.split(maxsplit=1)
-        if len(space_parts) == 2 and space_parts[0].isdigit():
-            size = int(space_parts[0])
-            name_encoded = space_parts[1]
-            decoded_name = urllib.parse.unquote(name_encoded)
-            if decoded_name.lower().endswith(('.epub', '.pdf')):
-                files_by_name[decoded_name] = size
-            continue
-        skipped_count += 1
-    if skipped_count > 0:
-        print(f'WARNING: Failed to parse {skipped_count} lines from device listing')
-    return files_by_name
-
-def copy_to_tolino(files_to_send, delay_seconds, randomize):
+def copy_to_tolino(files_to_send, delay_seconds, randomize, transport=None, controller=None):
+    transport = transport or GioTransport()
     print('Reading file list from device...')
     try:
-        existing_by_name = list_remote_files()
-        print(f'Found {len(existing_by_name)} files already on device')
+        manifest = load_device_manifest(transport)
+        print(f'Found {len(manifest)} files already on device')
     except RuntimeError as e:
         print(f'WARNING: Could not read device file list: {e}')
         print('Will attempt to copy all files without skipping duplicates')
-        existing_by_name = {}
+        manifest = None
+    existing = manifest if manifest is not None else DeviceManifest()
     files_list = list(files_to_send)
     if randomize:
         random.shuffle(files_list)
@@ -57,10 +24,10 @@ def copy_to_tolino(files_to_send, delay_seconds, randomize):
     skipped = 0
     failed = 0
     failed_files = []
-    total_files = len(files_list)
-    for index, local_path_str in enumerate(files_list, 1):
+    queued = DeviceManifest()
+    jobs = []
+    for local_path_str in files_list:
         local_path = Path(local_path_str)
-        print(f'{index}/{total_files}')
         if not local_path.is_file():
             print(f'ERROR: Local file not found: {local_path}')
             failed += 1
@@ -74,32 +41,43 @@ def copy_to_tolino(files_to_send, delay_seconds, randomize):
             failed += 1
             failed_files.append(str(local_path))
             continue
-        if remote_name in existing_by_name or any(s == local_size for s in existing_by_name.values()):
+        if remote_name in existing or existing.has_size(local_size) or remote_name in queued or queued.has_size(local_size):
             print(f'Skipping, already present: {remote_name}')
             skipped += 1
             continue
-        remote_filename_encoded = urllib.parse.quote(remote_name)
-        remote_uri = mtp_base + remote_filename_encoded
+        queued.add(remote_name, local_size)
+        jobs.append((local_path, remote_name, local_size))
+    total_jobs = len(jobs)
+    stats = new_stats(transport.clock)
+    controller = controller or RateController(delay=delay_seconds)
+    for index, (local_path, remote_name, local_size, error) in enumerate(send_files(jobs, transport, controller, stats), 1):
         book_name = remote_name.replace(".epub", "").replace(".pdf", "")[:50]
-        print(f'Copying {book_name} ({local_size} bytes)')
-        cmd = ["gio", "copy", str(local_path), remote_uri]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f'  copied')
+        if error is None:
+            print(f'{index}/{total_jobs} copied {book_name} ({local_size} bytes), next delay {controller.delay:.1f}s')
             copied += 1
-            existing_by_name[remote_name] = local_size
-            if index < total_files:
-                time.sleep(delay_seconds)
+            existing.add(remote_name, local_size)
         else:
-            error_msg = result.stderr.strip()
-            print(f'ERROR: copying failed: {error_msg}')
+            print(f'{index}/{total_jobs} ERROR: copying {book_name} failed: {error}')
             failed += 1
             failed_files.append(str(local_path))
+            remote_size = existing.check(remote_name)
+            if remote_size is not None and remote_size != local_size:
+                try:
+                    transport.delete(remote_name)
+                    existing.remove(remote_name)
+                    print(f'  removed partial copy ({remote_size} bytes)')
+                except RuntimeError as e:
+                    print(f'  WARNING: could not remove partial copy: {e}')
+    if jobs:
+        print_stats(stats)
+    if manifest is not None:
+        manifest.save()
     print(f'\nFinished: {copied} copied, {skipped} skipped, {failed} failed')
     if failed_files:
         print('Failed files:')
         for f in failed_files:
             print(f"  - {f}")
+    return stats
 
 def ask_yes_no(prompt):
     while True:
@@ -120,7 +98,7 @@ if __name__ == "__main__":
     epub_files = [str(p) for p in source_dir.glob("*.epub")]
     pdf_files  = [str(p) for p in source_dir.glob("*.pdf")]
     all_files = sorted(epub_files + pdf_files)
-    print(f'Delay {COPY_DELAY} seconds')
+    print(f'Initial delay {COPY_DELAY} seconds, adjusted to how fast the device keeps up')
     if not all_files:
         print('No files found')
     else:
@@ -0,0 +1,144 @@
+import os
+import mmap
+import math
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+MIN_BLOCK = 4096
+MAX_BLOCK = 131072
+SEGMENT = 8388608
+
+def block_size_for(size):
+    return max(MIN_BLOCK, min(MAX_BLOCK, math.isqrt(size) // MIN_BLOCK * MIN_BLOCK))
+
+def strong_checksum(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def weak_checksums(data, start, count, block_size):
+    x = np.frombuffer(data, dtype=np.uint8, count=count + block_size - 1, offset=start).astype(np.uint64)
+    positions = np.arange(len(x), dtype=np.uint64)
+    zero = np.zeros(1, dtype=np.uint64)
+    sums = np.concatenate((zero, np.cumsum(x, dtype=np.uint64)))
+    weighted = np.concatenate((zero, np.cumsum(x * positions, dtype=np.uint64)))
+    k = np.arange(count, dtype=np.uint64)
+    a = sums[block_size:block_size + count] - sums[:count]
+    b = (k + np.uint64(block_size)) * a - (weighted[block_size:block_size + count] - weighted[:count])
+    return (a & np.uint64(0xFFFF)) | ((b & np.uint64(0xFFFF)) << np.uint64(16))
+
+def map_file(f, size):
+    if not size:
+        return b""
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def block_signatures(dst_path, block_size):
+    signatures = {}
+    with open(dst_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        data = map_file(f, size)
+        for index in range(size // block_size):
+            offset = index * block_size
+            weak = int(weak_checksums(data, offset, 1, block_size)[0])
+            strong = strong_checksum(data[offset:offset + block_size])
+            signatures.setdefault(weak, {}).setdefault(strong, []).append(offset)
+    return signatures
+
+def plan_delta(src_path, dst_path, block_size=None):
+    dst_size = os.path.getsize(dst_path)
+    block_size = block_size or block_size_for(dst_size)
+    signatures = block_signatures(dst_path, block_size)
+    ops = []
+    literal = 0
+    with open(src_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        data = map_file(f, size)
+        total = size - block_size + 1
+        keys = np.fromiter(signatures, dtype=np.uint64, count=len(signatures))
+        candidates = []
+        for start in range(0, max(total, 0), SEGMENT):
+            weak = weak_checksums(data, start, min(SEGMENT, total - start), block_size)
+            candidates.append(np.flatnonzero(np.isin(weak, keys)) + start)
+        candidates = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.int64)
+        pos = 0
+        literal_start = 0
+        idx = 0
+        while idx < len(candidates):
+            offset = int(candidates[idx])
+            if offset < pos:
+                idx = int(np.searchsorted(candidates, pos))
+                continue
+            weak = int(weak_checksums(data, offset, 1, block_size)[0])
+            matches = signatures[weak].get(strong_checksum(data[offset:offset + block_size]))
+            if not matches:
+                idx += 1
+                continue
+            old_offset = offset if offset in matches else matches[0]
+            if literal_start < offset:
+                ops.append(("data", literal_start, offset - literal_start))
+                literal += offset - literal_start
+            if ops and ops[-1][0] == "copy" and ops[-1][1] + ops[-1][3] == offset and ops[-1][2] + ops[-1][3] == old_offset:
+                ops[-1] = ("copy", ops[-1][1], ops[-1][2], ops[-1][3] + block_size)
+            else:
+                ops.append(("copy", offset, old_offset, block_size))
+            pos = offset + block_size
+            literal_start = pos
+            idx += 1
+        if literal_start < size:
+            ops.append(("data", literal_start, size - literal_start))
+            literal += size - literal_start
+    return {"size": size, "block_size": block_size, "ops": ops, "literal": literal}
+
+def apply_in_place(src_path, dst_path, plan):
+    with open(src_path, "rb") as fsrc, open(dst_path, "r+b") as fdst:
+        for op in plan["ops"]:
+            if op[0] != "data":
+                continue
+            _, offset, length = op
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            remaining = length
+            while remaining:
+                block = fsrc.read(min(remaining, SEGMENT))
+                fdst.write(block)
+                remaining -= len(block)
+        fdst.truncate(plan["size"])
+        fdst.flush()
+        os.fsync(fdst.fileno())
+    shutil.copystat(src_path, dst_path)
+
+def apply_via_temp(src_path, dst_path, plan):
+    folder = os.path.dirname(os.path.abspath(dst_path))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(dst_path) + ".", suffix=".partial", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as out, open(src_path, "rb") as fsrc, open(dst_path, "rb") as fold:
+            for op in plan["ops"]:
+                if op[0] == "data":
+                    source, offset, length = fsrc, op[1], op[2]
+                else:
+                    source, offset, length = fold, op[2], op[3]
+                source.seek(offset)
+                remaining = length
+                while remaining:
+                    block = source.read(min(remaining, SEGMENT))
+                    out.write(block)
+                    remaining -= len(block)
+            out.flush()
+            os.fsync(out.fileno())
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def delta_update(src_path, dst_path, dry_run=False):
+    plan = plan_delta(src_path, dst_path)
+    if not dry_run:
+        if all(op[0] == "data" or op[1] == op[2] for op in plan["ops"]):
+            apply_in_place(src_path, dst_path, plan)
+        else:
+            apply_via_temp(src_path, dst_path, plan)
+    return plan["literal"]
@@ -0,0 +1,83 @@
+import os
+import json
+import urllib.parse
+from collections import Counter
+import hash_cache
+from transport import GioTransport
+
+def manifest_path(base):
+    return hash_cache.cache_path().parent / f"device-{urllib.parse.quote(base, safe='')}.json"
+
+class DeviceManifest:
+    def __init__(self, transport=None, files=None, stamp=None):
+        self.transport = transport
+        self.files = dict(files or {})
+        self.sizes = Counter(self.files.values())
+        self.stamp = stamp
+        self.stale = False
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def size_of(self, name):
+        return self.files.get(name)
+
+    def has_size(self, size):
+        return self.sizes[size] > 0
+
+    def add(self, name, size):
+        self.remove(name)
+        self.files[name] = size
+        self.sizes[size] += 1
+
+    def remove(self, name):
+        size = self.files.pop(name, None)
+        if size is not None:
+            self.sizes[size] -= 1
+            if not self.sizes[size]:
+                del self.sizes[size]
+
+    def check(self, name):
+        size = self.transport.stat(name) if self.transport is not None else None
+        if size is None:
+            self.remove(name)
+            self.stale = True
+        else:
+            self.add(name, size)
+        return size
+
+    def save(self, refresh_stamp=True):
+        if self.transport is None:
+            return
+        if refresh_stamp and not self.stale:
+            self.stamp = self.transport.stamp()
+        path = manifest_path(self.transport.base)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"base": self.transport.base, "stamp": self.stamp, "files": self.files}, f)
+        os.replace(tmp_path, path)
+
+def load_cached(transport):
+    try:
+        with open(manifest_path(transport.base), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("base") != transport.base:
+        return None
+    return DeviceManifest(transport, data.get("files"), data.get("stamp"))
+
+def load_device_manifest(transport=None, use_cache=True):
+    transport = transport or GioTransport()
+    stamp = transport.stamp()
+    cached = load_cached(transport) if use_cache else None
+    if cached is not None and stamp is not None and cached.stamp == stamp:
+        print('Device folder unchanged, using cached file list')
+        return cached
+    manifest = DeviceManifest(transport, transport.list(), stamp)
+    manifest.save(refresh_stamp=False)
+    return manifest
@@ -0,0 +1,84 @@
+import os
+import time
+import hashlib
+import tempfile
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+BLOCK_SIZE = 1048576
+
+def available_algorithms():
+    names = ["md5", "blake2b"]
+    if xxhash is not None:
+        names.append("xxh3_128")
+    if blake3 is not None:
+        names.append("blake3")
+    return names
+
+def new_hasher(algorithm):
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise ValueError("xxhash is not installed")
+        return xxhash.xxh3_128()
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise ValueError("blake3 is not installed")
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+def file_digest(path, algorithm="md5", block_size=BLOCK_SIZE):
+    h = new_hasher(algorithm)
+    buf = bytearray(block_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buf)
+            if not count:
+                break
+            h.update(view[:count])
+    return h.hexdigest()
+
+def drop_page_cache(path):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    with open(path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+def benchmark(folder, size_mb=256, block_sizes=(65536, 524288, BLOCK_SIZE, 4 * BLOCK_SIZE)):
+    results = []
+    with tempfile.NamedTemporaryFile(dir=folder, delete=False) as tmp:
+        chunk = os.urandom(BLOCK_SIZE)
+        for _ in range(size_mb):
+            tmp.write(chunk)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        path = tmp.name
+    try:
+        for algorithm in available_algorithms():
+            for block_size in block_sizes:
+                drop_page_cache(path)
+                start = time.perf_counter()
+                file_digest(path, algorithm, block_size)
+                elapsed = time.perf_counter() - start
+                results.append((algorithm, block_size, size_mb / elapsed if elapsed else float("inf")))
+    finally:
+        os.unlink(path)
+    return results
+
+def main():
+    folder = input("Folder on the disk to benchmark (default .): ").strip() or "."
+    size_input = input("Test file size in MB (default 256): ").strip()
+    size_mb = int(size_input) if size_input.isdigit() else 256
+    print(f"Hashing a {size_mb} MB test file in {folder}...")
+    for algorithm, block_size, speed in benchmark(folder, size_mb):
+        print(f"  {algorithm:<10} {block_size // 1024:>5} KiB blocks  {speed:8.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import re
+import json
+import zlib
+import posixpath
+from zipfile import ZipFile, BadZipFile
+from lxml import etree
+import hash_cache
+from parallel_duplicates import find_root, union
+
+CONTAINER_PATH = "META-INF/container.xml"
+CACHE_KEY = "epub-meta-v1"
+NS = {
+    "c": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+ISBN_PATTERN = re.compile(r"97[89][0-9]{10}|[0-9]{9}[0-9X]")
+
+parser = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+
+def isbn_valid(isbn):
+    if len(isbn) == 13:
+        total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(isbn))
+        return total % 10 == 0
+    total = sum((10 if d == "X" else int(d)) * (10 - i) for i, d in enumerate(isbn))
+    return total % 11 == 0
+
+def isbn10_to_13(isbn):
+    core = "978" + isbn[:9]
+    check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(core)) % 10) % 10
+    return core + str(check)
+
+def find_isbn(identifiers):
+    for value in identifiers:
+        compact = re.sub(r"[\s-]", "", value.upper())
+        for match in ISBN_PATTERN.findall(compact):
+            if isbn_valid(match):
+                return match if len(match) == 13 else isbn10_to_13(match)
+    return None
+
+def parse_xml(data, name):
+    root = etree.fromstring(data, parser)
+    if root is None:
+        raise ValueError(f"{name} is not XML")
+    return root
+
+def opf_path(zf):
+    container = parse_xml(zf.read(CONTAINER_PATH), CONTAINER_PATH)
+    rootfile = container.find(".//c:rootfile", NS)
+    if rootfile is None or not rootfile.get("full-path"):
+        raise ValueError("container.xml has no rootfile")
+    return rootfile.get("full-path")
+
+def texts(root, xpath):
+    return [" ".join(el.text.split()) for el in root.iterfind(xpath, NS) if el.text and el.text.strip()]
+
+def cover_href(opf, base):
+    item = opf.find(".//opf:manifest/opf:item[@properties='cover-image']", NS)
+    if item is None:
+        meta = opf.find(".//opf:metadata/opf:meta[@name='cover']", NS)
+        if meta is not None:
+            item = next((i for i in opf.iterfind(".//opf:manifest/opf:item", NS) if i.get("id") == meta.get("content")), None)
+    if item is None or not item.get("href"):
+        return None
+    return posixpath.normpath(posixpath.join(base, item.get("href")))
+
+def read_metadata(path):
+    with ZipFile(path) as zf:
+        opf_name = opf_path(zf)
+        opf = parse_xml(zf.read(opf_name), opf_name)
+    identifiers = texts(opf, ".//opf:metadata/dc:identifier")
+    titles = texts(opf, ".//opf:metadata/dc:title")
+    return {
+        "title": titles[0] if titles else None,
+        "creators": texts(opf, ".//opf:metadata/dc:creator"),
+        "identifiers": identifiers,
+        "isbn": find_isbn(identifiers),
+        "cover": cover_href(opf, posixpath.dirname(opf_name)),
+    }
+
+def cached_metadata(path, st=None):
+    def compute(p):
+        try:
+            return json.dumps(read_metadata(p))
+        except (BadZipFile, KeyError, ValueError, etree.XMLSyntaxError, NotImplementedError, RuntimeError, zlib.error):
+            return "null"
+    return json.loads(hash_cache.cached_metadata(path, CACHE_KEY, compute, st))
+
+def metadata_keys(meta, normalize):
+    keys = []
+    if meta.get("isbn"):
+        keys.append(("isbn", meta["isbn"]))
+    title = normalize(meta.get("title") or "")
+    if title:
+        author = normalize(meta["creators"][0]) if meta.get("creators") else ""
+        keys.append(("title", title, author))
+    return keys
+
+def find_metadata_duplicates(files, normalize):
+    parent = list(range(len(files)))
+    first_with_key = {}
+    for idx in range(len(files)):
+        entry = files[idx]
+        if not entry.name.lower().endswith(".epub"):
+            continue
+        try:
+            meta = cached_metadata(entry.path)
+        except OSError as e:
+            print(f"Error reading {entry.path}: {e}")
+            continue
+        if not meta:
+            continue
+        for key in metadata_keys(meta, normalize):
+            other = first_with_key.setdefault(key, idx)
+            if other != idx:
+                union(parent, other, idx)
+    members = {}
+    for idx in range(len(files)):
+        members.setdefault(find_root(parent, idx), []).append(idx)
+    return [files.entries(group) for group in members.values() if len(group) > 1]
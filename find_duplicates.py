@@ -1,7 +1,15 @@
 import os
 import unicodedata
+from array import array
 from pathlib import Path
 from collections import defaultdict
+import numpy as np
+from title_index import candidate_pairs
+from title_scoring import pack_titles, score_pairs
+from parallel_duplicates import group_similar_files_parallel
+from scanner import scan_files
+from catalog import FileCatalog
+from epub_metadata import find_metadata_duplicates
 
 def normalize_title(title):
     title = title.strip()
@@ -47,37 +55,58 @@ def title_similarity(a, b):
     similarity = 1.0 - (distance / max_len)
     return similarity if similarity > 0 else 0.0
 
-def find_duplicates(folder_path, threshold=0.92):
+def find_duplicates(folder_path, threshold=0.92, workers=1, by_metadata=False):
     folder = Path(folder_path)
     if not folder.is_dir():
         print(f"Error: Folder not found: {folder_path}")
         return []
     recursive = input("Search subfolders? (y/n): ").strip().lower() == 'y'
-    files = [f for f in (folder.rglob("*") if recursive else folder.iterdir()) if f.is_file()]
+    files = FileCatalog()
+    files.add_root(folder, scan_files(folder, recursive))
     print(f"Scanning {len(files)} files for duplicates...")
+    if by_metadata:
+        return find_metadata_duplicates(files, normalize_title)
+    if workers > 1:
+        titles, title_of = title_table(files)
+        return group_similar_files_parallel(files, titles, title_of, threshold, workers)
+    return group_similar_files(files, threshold)
+
+def title_table(files):
+    title_ids = {}
+    title_of = array("i")
+    for idx in range(len(files)):
+        norm = normalize_title(files.stem(idx))
+        title_of.append(title_ids.setdefault(norm, len(title_ids)) if norm else -1)
+    return list(title_ids), np.array(title_of, dtype=np.int32)
+
+def group_similar_files(files, threshold):
+    titles, title_of = title_table(files)
+    titled = title_of[title_of >= 0]
+    counts = np.bincount(titled, minlength=len(titles))
+    starts = len(title_of) - len(titled) + np.concatenate(([0], np.cumsum(counts)[:-1]))
+    members = np.argsort(title_of, kind="stable")
+    similar = defaultdict(list)
+    packed = pack_titles(titles)
+    for a, b, score in score_pairs(packed, candidate_pairs(titles, threshold)):
+        if score >= threshold:
+            similar[a].append(b)
+            similar[b].append(a)
     duplicate_groups = []
-    processed = set()
-    for i, file_a in enumerate(files):
-        if file_a in processed:
+    processed = np.zeros(len(files), dtype=bool)
+    for i in range(len(files)):
+        title_a = title_of[i]
+        if title_a < 0 or processed[i]:
             continue
-        norm_a = normalize_title(file_a.stem)
-        if not norm_a:
+        if counts[title_a] == 1 and title_a not in similar:
             continue
-        group = [file_a]
-        for j in range(i + 1, len(files)):
-            file_b = files[j]
-            if file_b in processed:
-                continue
-            norm_b = normalize_title(file_b.stem)
-            if not norm_b:
-                continue
-            score = title_similarity(norm_a, norm_b)
-            if score >= threshold:
-                group.append(file_b)
-                processed.add(file_b)
-        if len(group) > 1:
-            duplicate_groups.append(group)
-            processed.add(file_a)
+        related = [title_a] + similar.get(title_a, [])
+        matches = np.concatenate([members[starts[t]:starts[t] + counts[t]] for t in related])
+        matches = matches[matches > i]
+        matches = np.sort(matches[~processed[matches]])
+        if len(matches):
+            processed[i] = True
+            processed[matches] = True
+            duplicate_groups.append(files.entries([i, *matches]))
     return duplicate_groups
 
 def display_duplicates(duplicate_groups):
@@ -87,9 +116,9 @@ def display_duplicates(duplicate_groups):
     print(f"\nFound {len(duplicate_groups)} potential duplicates:\n")
     for idx, group in enumerate(duplicate_groups, 1):
         print(f"Group {idx}:")
-        sorted_group = sorted(group, key=lambda f: f.stat().st_mtime, reverse=True)
+        sorted_group = sorted(group, key=lambda f: f.mtime_ns, reverse=True)
         for file in sorted_group:
-            size = file.stat().st_size
+            size = file.size
             size_kb = size / 1024
             if size_kb < 1024:
                 size_str = f"{size_kb:.1f} KB"
@@ -112,7 +141,16 @@ def main():
             threshold = 0.92
     else:
         threshold = 0.92
-    duplicate_groups = find_duplicates(folder_path, threshold)
+    workers_input = input("Worker processes (default 1, 0 = all cores): ").strip()
+    try:
+        workers = int(workers_input) if workers_input else 1
+    except ValueError:
+        print("Invalid worker count, using 1")
+        workers = 1
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    by_metadata = input("Compare by file name or EPUB metadata? (name/meta, default name): ").strip().lower().startswith("meta")
+    duplicate_groups = find_duplicates(folder_path, threshold, workers, by_metadata)
     display_duplicates(duplicate_groups)
 
 if __name__ == "__main__":
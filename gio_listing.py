@@ -0,0 +1,80 @@
+import subprocess
+import tempfile
+import urllib.parse
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+ListingEntry = namedtuple("ListingEntry", "name size type")
+
+default_workers = 4
+
+def parse_line(line):
+    line = line.rstrip("\n")
+    if not line:
+        return None
+    tab_parts = line.split("\t")
+    if len(tab_parts) >= 2 and tab_parts[1].isdigit():
+        file_type = tab_parts[2].strip("()") if len(tab_parts) >= 3 else "regular"
+        return ListingEntry(urllib.parse.unquote(tab_parts[0]), int(tab_parts[1]), file_type)
+    space_parts = line.split(maxsplit=1)
+    if len(space_parts) == 2 and space_parts[0].isdigit():
+        return ListingEntry(urllib.parse.unquote(space_parts[1]), int(space_parts[0]), "regular")
+    return None
+
+def stream_lines(uri):
+    with tempfile.TemporaryFile("w+") as stderr:
+        proc = subprocess.Popen(["gio", "list", "-l", uri], stdout=subprocess.PIPE, stderr=stderr, text=True)
+        try:
+            for line in proc.stdout:
+                yield line
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        stderr.seek(0)
+        error = stderr.read()
+    if proc.returncode != 0:
+        raise RuntimeError(f"gio command failed: gio list -l {uri}\nError: {error.strip()}")
+
+def stream_listing(uri, counts=None):
+    for line in stream_lines(uri):
+        entry = parse_line(line)
+        if entry is None:
+            if counts is not None and line.strip():
+                counts["skipped"] = counts.get("skipped", 0) + 1
+            continue
+        yield entry
+
+def child_uri(uri, name):
+    return uri.rstrip("/") + "/" + urllib.parse.quote(name) + "/"
+
+def list_folder(uri, prefix):
+    counts = {}
+    return prefix, uri, list(stream_listing(uri, counts)), counts
+
+def list_recursive(uri, workers=None, counts=None):
+    workers = max(1, workers or default_workers)
+    counts = counts if counts is not None else {}
+    pending = deque([(uri, "")])
+    running = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            while pending and len(running) < workers:
+                folder_uri, prefix = pending.popleft()
+                running.add(pool.submit(list_folder, folder_uri, prefix))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    prefix, folder_uri, entries, folder_counts = future.result()
+                except RuntimeError as e:
+                    print(f"WARNING: {e}")
+                    counts["failed"] = counts.get("failed", 0) + 1
+                    continue
+                counts["skipped"] = counts.get("skipped", 0) + folder_counts.get("skipped", 0)
+                for entry in entries:
+                    path = prefix + entry.name
+                    if entry.type == "directory":
+                        pending.append((child_uri(folder_uri, entry.name), path + "/"))
+                        continue
+                    yield ListingEntry(path, entry.size, entry.type)
@@ -0,0 +1,134 @@
+import os
+import atexit
+import sqlite3
+import threading
+from pathlib import Path
+
+enabled = True
+commit_every = 256
+
+lock = threading.Lock()
+state = {'conn': None, 'pending': 0}
+
+def cache_path():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'file-sort' / 'hashes.sqlite3'
+
+def connect():
+    if state['conn'] is None:
+        path = cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS hashes (
+            dev INTEGER, inode INTEGER, algorithm TEXT,
+            size INTEGER, mtime_ns INTEGER, digest TEXT, path TEXT,
+            PRIMARY KEY (dev, inode, algorithm))""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS metadata (
+            dev INTEGER, inode INTEGER, kind TEXT,
+            size INTEGER, mtime_ns INTEGER, data TEXT, path TEXT,
+            PRIMARY KEY (dev, inode, kind))""")
+        state['conn'] = conn
+        atexit.register(flush)
+    return state['conn']
+
+def flush():
+    with lock:
+        if state['conn'] is not None and state['pending']:
+            state['conn'].commit()
+            state['pending'] = 0
+
+def lookup_key(dev, inode, size, mtime_ns, algorithm):
+    if not enabled:
+        return None
+    with lock:
+        row = connect().execute("SELECT size, mtime_ns, digest FROM hashes WHERE dev=? AND inode=? AND algorithm=?",
+            (dev, inode, algorithm)).fetchone()
+    if row and row[0] == size and row[1] == mtime_ns:
+        return row[2]
+    return None
+
+def lookup_digest(path, algorithm, st=None):
+    if not enabled:
+        return None
+    if st is None:
+        st = os.stat(path)
+    return lookup_key(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm)
+
+def cached_digest(path, algorithm, compute, st=None):
+    if not enabled:
+        return compute(path)
+    if st is None:
+        st = os.stat(path)
+    digest = lookup_digest(path, algorithm, st)
+    if digest is not None:
+        return digest
+    digest = compute(path)
+    store_digest(path, algorithm, digest, st)
+    return digest
+
+def store_digest(path, algorithm, digest, st):
+    store_row("hashes", path, algorithm, digest, st)
+
+def store_row(table, path, key, value, st):
+    if not enabled:
+        return
+    with lock:
+        conn = connect()
+        conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (st.st_dev, st.st_ino, key, st.st_size, st.st_mtime_ns, value, os.fspath(path)))
+        state['pending'] += 1
+        if state['pending'] >= commit_every:
+            conn.commit()
+            state['pending'] = 0
+
+def lookup_metadata(path, kind, st=None):
+    if not enabled:
+        return None
+    if st is None:
+        st = os.stat(path)
+    with lock:
+        row = connect().execute("SELECT size, mtime_ns, data FROM metadata WHERE dev=? AND inode=? AND kind=?",
+            (st.st_dev, st.st_ino, kind)).fetchone()
+    if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+        return row[2]
+    return None
+
+def cached_metadata(path, kind, compute, st=None):
+    if not enabled:
+        return compute(path)
+    if st is None:
+        st = os.stat(path)
+    data = lookup_metadata(path, kind, st)
+    if data is not None:
+        return data
+    data = compute(path)
+    store_row("metadata", path, kind, data, st)
+    return data
+
+def prune(root=None):
+    if not enabled:
+        return 0
+    prefix = os.fspath(Path(root).expanduser().resolve()) + os.sep if root else ''
+    removed = 0
+    for table, key in (("hashes", "algorithm"), ("metadata", "kind")):
+        with lock:
+            conn = connect()
+            rows = conn.execute(f"SELECT dev, inode, {key}, size, mtime_ns, path FROM {table} WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)).fetchall()
+        stale = []
+        for dev, inode, kind, size, mtime_ns, path in rows:
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append((dev, inode, kind))
+                continue
+            if (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) != (dev, inode, size, mtime_ns):
+                stale.append((dev, inode, kind))
+        with lock:
+            conn.executemany(f"DELETE FROM {table} WHERE dev=? AND inode=? AND {key}=?", stale)
+            conn.commit()
+            state['pending'] = 0
+        removed += len(stale)
+    return removed
@@ -1,26 +1,106 @@
-import os
 import sys
 from pathlib import Path
+import hash_cache
+from digest_engine import file_digest
+from find_duplicates import normalize_title
+from scanner import entry_stem
+from snapshot import folder_entries, is_snapshot
+from title_index import cross_candidates
+from title_scoring import pack_titles, score_pairs
 
-def get_filenames(path, recursive):
+digest_algorithm = "md5"
+match_modes = {"name": ("name",), "title": ("title",), "content": ("content",), "both": ("title", "content")}
+
+def get_entries(path, recursive):
     folder = Path(path).resolve()
-    if not folder.is_dir():
-        print(f"Error: {folder} is not a folder")
+    if not folder.is_dir() and not is_snapshot(folder):
+        print(f"Error: {folder} is not a folder or snapshot")
         sys.exit(1)
-    files = set()
-    iterator = folder.rglob("*") if recursive else folder.iterdir()
-    for item in iterator:
-        if item.is_file():
-            files.add(item.name.lower())
-    return files
+    _, entries = folder_entries(folder, recursive)
+    return list(entries)
+
+def name_keys(entries):
+    return [entry.name.lower() for entry in entries]
+
+def title_keys(entries):
+    return [normalize_title(entry_stem(entry)) or None for entry in entries]
+
+def content_keys(entries, other_sizes):
+    keys = []
+    for entry in entries:
+        if entry.size not in other_sizes:
+            keys.append(None)
+            continue
+        try:
+            digest = hash_cache.cached_digest(entry.path, digest_algorithm, lambda p: file_digest(p, digest_algorithm))
+        except OSError as e:
+            print(f"Error hashing {entry.path}: {e}")
+            keys.append(None)
+            continue
+        keys.append((entry.size, digest))
+    return keys
+
+def side_keys(entries_a, entries_b, key, pending):
+    if key == "name":
+        return name_keys(entries_a), name_keys(entries_b)
+    if key == "title":
+        return title_keys(entries_a), title_keys(entries_b)
+    pending_a = [entries_a[idx] for idx in pending]
+    sizes_a = {entry.size for entry in pending_a}
+    sizes_b = {entry.size for entry in entries_b}
+    return dict(zip(pending, content_keys(pending_a, sizes_b))), content_keys(entries_b, sizes_a)
+
+def fuzzy_matches(titles_a, titles_b, threshold):
+    queries = sorted({t for t in titles_a if t})
+    targets = sorted({t for t in titles_b if t})
+    if not queries or not targets:
+        return set()
+    pairs = sorted(cross_candidates(queries, targets, threshold))
+    combined = pack_titles(queries + targets)
+    offset = len(queries)
+    matched = set()
+    for a, b, score in score_pairs(combined, [(q, offset + t) for q, t in pairs]):
+        if score >= threshold:
+            matched.add(queries[a])
+    return matched
+
+def find_missing(entries_a, entries_b, mode="name", fuzzy_threshold=None):
+    missing = list(range(len(entries_a)))
+    titles = None
+    for key in match_modes[mode]:
+        keys_a, keys_b = side_keys(entries_a, entries_b, key, missing)
+        present = {k for k in keys_b if k is not None}
+        missing = [idx for idx in missing if keys_a[idx] is None or keys_a[idx] not in present]
+        if key == "title":
+            titles = keys_a, keys_b
+    if fuzzy_threshold and missing:
+        if titles is None:
+            titles = title_keys(entries_a), title_keys(entries_b)
+        leftovers = [titles[0][idx] for idx in missing]
+        matched = fuzzy_matches(leftovers, titles[1], fuzzy_threshold)
+        missing = [idx for idx in missing if titles[0][idx] not in matched]
+    return [entries_a[idx] for idx in missing]
 
 def main():
     folder_a = input('In folder: ')
     folder_b = input('But not in folder: ')
     recursive = input('Search subfolders? (y/n): ').strip().lower() == 'y'
-    files_a = get_filenames(folder_a, recursive)
-    files_b = get_filenames(folder_b, recursive)
-    only_in_a = sorted(files_a - files_b)
+    mode = input('Match by (name/title/content/both, default name): ').strip().lower() or "name"
+    if mode not in match_modes:
+        print("Unknown match mode, using name")
+        mode = "name"
+    fuzzy_input = input('Fuzzy title threshold for leftovers (0.0-1.0, blank to skip): ').strip()
+    try:
+        fuzzy_threshold = float(fuzzy_input) if fuzzy_input else None
+    except ValueError:
+        print("Invalid threshold, skipping fuzzy pass")
+        fuzzy_threshold = None
+    entries_a = get_entries(folder_a, recursive)
+    entries_b = get_entries(folder_b, recursive)
+    show_missing(find_missing(entries_a, entries_b, mode, fuzzy_threshold), folder_a, folder_b)
+
+def show_missing(missing, folder_a, folder_b):
+    only_in_a = sorted({entry.name.lower() for entry in missing})
     if not only_in_a:
         print("No files found that exist only in the first folder.")
         return
@@ -31,4 +111,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
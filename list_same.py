@@ -1,57 +1,250 @@
-import hashlib
+import os
+import shutil
 from pathlib import Path
 from collections import defaultdict
+import numpy as np
 from replace_changed import md5_of_file
+import hash_cache
+from digest_engine import new_hasher, file_digest
+from snapshot import folder_entries, is_snapshot, load_snapshot
+from manifest import is_manifest, read_header, read_manifest
+from catalog import build_catalog
+from compare_files import files_identical
+from copy_engine import try_reflink
 
-def find_identical_files(folder1_path, folder2_path):
-    folder1 = Path(folder1_path).expanduser().resolve()
-    folder2 = Path(folder2_path).expanduser().resolve()
-    files1 = [p for p in folder1.iterdir() if p.is_file()]
-    files2 = [p for p in folder2.iterdir() if p.is_file()]
-    print(f"Found {len(files1)} files in first folder")
-    print(f"Found {len(files2)} files in second folder")
-    size_to_paths = defaultdict(list)
-    for p in files1 + files2:
+EDGE_BYTES = 65536
+digest_algorithm = "md5"
+
+def source_roots(sources):
+    roots = []
+    for source in sources:
+        if is_snapshot(source):
+            roots.append(Path(load_snapshot(source)["root"]))
+        else:
+            roots.append(Path(source).resolve())
+    return roots
+
+def find_identical_in_roots(sources, recursive=False):
+    return find_identical_in_catalog(build_catalog(sources, recursive))
+
+def find_identical_in_catalog(catalog):
+    root_ids = catalog.column("root_ids")
+    for idx in range(len(catalog.roots)):
+        print(f"Found {int((root_ids == idx).sum())} files in folder {idx + 1}")
+    sizes, counts = np.unique(catalog.column("sizes"), return_counts=True)
+    stats = {"avoided_by_size": int(sizes[counts == 1].sum()), "avoided_by_edges": 0, "full_read": 0}
+    for size, indexes in catalog.size_buckets():
+        items = [(catalog.root_ids[int(idx)], catalog[int(idx)]) for idx in indexes]
+        yield from identical_groups_in_bucket(items, stats)
+    print(f"Size filter avoided reading {format_bytes(stats['avoided_by_size'])}")
+    print(f"Edge hash filter avoided reading {format_bytes(stats['avoided_by_edges'])}")
+    print(f"Full hashes covered {format_bytes(stats['full_read'])}")
+
+def manifest_side(path):
+    header = read_header(path)
+    return Path(header.get("root", path)), header.get("algorithm", "md5")
+
+def find_identical_with_manifest(folder1_path, folder2_path):
+    args = [Path(folder1_path).expanduser(), Path(folder2_path).expanduser()]
+    roots = []
+    live = []
+    manifests = []
+    algorithms = set()
+    for source, arg in enumerate(args):
+        if is_manifest(arg):
+            root, algorithm = manifest_side(arg)
+            roots.append(root)
+            manifests.append((source, arg, root))
+            algorithms.add(algorithm)
+        else:
+            root, entries = folder_entries(arg)
+            roots.append(Path(root))
+            live.extend((source, entry) for entry in entries)
+    if len(algorithms) > 1:
+        raise ValueError(f"Manifests use different digest algorithms: {', '.join(sorted(algorithms))}")
+    algorithm = algorithms.pop()
+    streamed = manifests if len(manifests) < len(args) else manifests[1:]
+    wanted_sizes = set()
+    for _, arg, _ in streamed:
+        wanted_sizes.update(entry.size for entry in read_manifest(arg))
+    live_sizes = defaultdict(int)
+    for _, entry in live:
+        live_sizes[entry.size] += 1
+    wanted_sizes.update(size for size, count in live_sizes.items() if count > 1)
+    index = defaultdict(list)
+    if len(manifests) < len(args):
+        print(f"Found {len(live)} local files, comparing against {len(manifests)} manifest(s)")
+    else:
+        source, arg, root = manifests[0]
+        print(f"Comparing {len(manifests)} manifests")
+        for entry in read_manifest(arg):
+            if entry.size in wanted_sizes:
+                index[(entry.size, entry.digest)].append((source, entry._replace(path=os.path.join(root, entry.path))))
+    for source, entry in live:
+        if entry.size not in wanted_sizes:
+            continue
         try:
-            size = p.stat().st_size
-            size_to_paths[size].append(p)
-        except:
-            pass
-    matches = []
-    for size, paths in size_to_paths.items():
-        if len(paths) < 2:
+            digest = md5_of_file(entry.path, algorithm)
+        except OSError:
+            continue
+        index[(entry.size, digest)].append((source, entry))
+    for source, arg, root in streamed:
+        for entry in read_manifest(arg):
+            key = (entry.size, entry.digest)
+            if key not in index:
+                continue
+            index[key].append((source, entry._replace(path=os.path.join(root, entry.path))))
+    groups = [group for group in index.values() if len(group) >= 2]
+    return groups, roots[0], roots[1]
+
+def edge_digest(path, size):
+    h = new_hasher(digest_algorithm)
+    with open(path, "rb") as f:
+        if size <= 2 * EDGE_BYTES:
+            h.update(f.read())
+        else:
+            h.update(f.read(EDGE_BYTES))
+            f.seek(size - EDGE_BYTES)
+            h.update(f.read(EDGE_BYTES))
+    return h.hexdigest()
+
+def edge_bytes(size):
+    return min(size, 2 * EDGE_BYTES)
+
+def counted_digest(path, size, stats):
+    digest = file_digest(path, digest_algorithm)
+    stats["full_read"] += size
+    return digest
+
+def identical_groups_in_bucket(items, stats):
+    size = items[0][1].size
+    edge_to_entries = defaultdict(list)
+    for source, entry in items:
+        try:
+            digest = hash_cache.cached_digest(entry.path, f"{digest_algorithm}-edge{EDGE_BYTES}", lambda path: edge_digest(path, size))
+        except OSError:
             continue
-        checksum_to_paths = defaultdict(list)
-        for p in paths:
-            cs = md5_of_file(p)
-            checksum_to_paths[cs].append(p)
-        for cs, group in checksum_to_paths.items():
+        edge_to_entries[digest].append((source, entry))
+    for edge, candidates in edge_to_entries.items():
+        if len(candidates) < 2:
+            stats["avoided_by_edges"] += (size - edge_bytes(size)) * len(candidates)
+            continue
+        if size <= 2 * EDGE_BYTES:
+            yield candidates
+            continue
+        checksum_to_entries = defaultdict(list)
+        for source, entry in candidates:
+            try:
+                checksum_to_entries[hash_cache.cached_digest(entry.path, digest_algorithm, lambda path: counted_digest(path, size, stats))].append((source, entry))
+            except OSError:
+                continue
+        for cs, group in checksum_to_entries.items():
             if len(group) >= 2:
-                matches.append(group)
-    return matches, folder1, folder2
+                yield group
+
+def format_bytes(size):
+    size_mb = size / 1048576
+    if size_mb < 1024:
+        return f"{size_mb:.1f} MB"
+    return f"{size_mb/1024:.1f} GB"
 
-def show_matches(groups, folder1, folder2):
+def show_matches(groups):
     if not groups:
         print("\nNo identical files found.")
         return
     print(f"\nFound {len(groups)} group(s) of identical files:\n")
     for i, group in enumerate(groups, 1):
-        size = group[0].stat().st_size
-        size_kb = size / 1024
+        size_kb = group[0][1].size / 1024
         size_str = f"{size_kb:.1f} KB" if size_kb < 1024 else f"{size_kb/1024:.1f} MB"
         print(f"Group {i} – {size_str}")
-        for p in group:
-            if p.is_relative_to(folder1):
-                print(f"  Folder 1: {p.name}")
-            else:
-                print(f"  Folder 2: {p.name}")
+        for source, entry in group:
+            print(f"  Folder {source + 1}: {entry.name}")
         print()
 
+def same_file_state(entry):
+    try:
+        st = os.stat(entry.path)
+    except OSError:
+        return False
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) == (entry.dev, entry.inode, entry.size, entry.mtime_ns)
+
+def link_in_place(master, target, mode):
+    folder = os.path.dirname(target)
+    tmp_path = os.path.join(folder, f".{os.path.basename(target)}.relink")
+    try:
+        if mode == "hardlink":
+            os.link(master, tmp_path)
+        else:
+            with open(master, "rb") as fsrc, open(tmp_path, "wb") as fdst:
+                if not try_reflink(fsrc.fileno(), fdst.fileno()):
+                    raise OSError("reflink not supported on this filesystem")
+            shutil.copystat(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def relink_duplicates(groups, mode="hardlink"):
+    reclaimed = 0
+    relinked = 0
+    for group in groups:
+        master = group[0][1]
+        if not same_file_state(master):
+            print(f"Skipping group of {master.name}: first copy changed since the scan")
+            continue
+        for _, entry in group[1:]:
+            if (entry.dev, entry.inode) == (master.dev, master.inode):
+                continue
+            if entry.dev != master.dev:
+                print(f"Skipping {entry.path}: on a different filesystem")
+                continue
+            try:
+                nlink = os.stat(entry.path).st_nlink
+                if not same_file_state(entry) or not files_identical(master.path, entry.path):
+                    print(f"Skipping {entry.path}: changed since the scan")
+                    continue
+                link_in_place(master.path, entry.path, mode)
+            except OSError as e:
+                print(f"Error relinking {entry.path}: {e}")
+                continue
+            relinked += 1
+            if mode == "reflink" or nlink == 1:
+                reclaimed += entry.size
+    print(f"Relinked {relinked} files, reclaimed {format_bytes(reclaimed)}")
+    return reclaimed
+
+def ask_folders():
+    folders = []
+    while True:
+        folder = input(f"Folder {len(folders) + 1} (blank to finish): ").strip()
+        if not folder:
+            if len(folders) >= 2:
+                return folders
+            print("Please give at least two folders")
+            continue
+        folders.append(folder)
+
 def main():
-    folder1 = input("First folder: ").strip()
-    folder2 = input("Second folder: ").strip()
-    groups, f1, f2 = find_identical_files(folder1, folder2)
-    show_matches(groups, f1, f2)
+    folders = ask_folders()
+    if any(is_manifest(f) for f in folders):
+        if len(folders) != 2:
+            print("Manifests can only be compared against one other folder")
+            return
+        groups, f1, f2 = find_identical_with_manifest(folders[0], folders[1])
+        show_matches(groups)
+        return
+    sources = [Path(f).expanduser() for f in folders]
+    roots = source_roots(sources)
+    groups = list(find_identical_in_roots(sources))
+    show_matches(groups)
+    action = input("Replace duplicate copies with links? (none/hardlink/reflink): ").strip().lower()
+    if action in ("hardlink", "reflink"):
+        relink_duplicates(groups, action)
+    for root in roots:
+        hash_cache.prune(root)
 
 if __name__ == "__main__":
     main()
@@ -1,35 +1,77 @@
 from pathlib import Path
+from compare_files import files_identical
+import hash_cache
+from scanner import scan_files
+from manifest import is_manifest, read_header, read_manifest
 from replace_changed import md5_of_file
 
+digest_algorithm = "md5"
+
 def find_files_in_both(folder1_path, folder2_path):
     folder1 = Path(folder1_path).expanduser().resolve()
     folder2 = Path(folder2_path).expanduser().resolve()
-    names1 = {p.name: p for p in folder1.iterdir() if p.is_file()}
-    names2 = {p.name: p for p in folder2.iterdir() if p.is_file()}
+    return pair_by_name(scan_files(folder1), scan_files(folder2)), folder1, folder2
+
+def pair_by_name(entries1, entries2):
+    names1 = {entry.name: entry for entry in entries1}
+    names2 = {entry.name: entry for entry in entries2}
     print(f"Found {len(names1)} files in first folder")
     print(f"Found {len(names2)} files in second folder")
     shared_names = sorted(set(names1) & set(names2))
-    matches = [(names1[n], names2[n]) for n in shared_names]
-    return matches, folder1, folder2
+    return [(names1[n], names2[n]) for n in shared_names]
+
+def find_files_in_both_with_manifest(folder1_path, folder2_path):
+    sides = [Path(folder1_path).expanduser(), Path(folder2_path).expanduser()]
+    streamed = 1 if is_manifest(sides[1]) else 0
+    indexed = 1 - streamed
+    if is_manifest(sides[indexed]):
+        names = {entry.name: entry for entry in read_manifest(sides[indexed]) if entry.path == entry.name}
+    else:
+        names = {entry.name: entry for entry in scan_files(sides[indexed].resolve())}
+    print(f"Indexed {len(names)} files from {sides[indexed]}")
+    matches = []
+    for entry in read_manifest(sides[streamed]):
+        if entry.path != entry.name:
+            continue
+        other = names.get(entry.name)
+        if other is not None:
+            matches.append((other, entry) if indexed == 0 else (entry, other))
+    matches.sort(key=lambda pair: pair[0].name)
+    return matches, read_header(sides[streamed]).get("algorithm", "md5")
 
-def show_matches(pairs, folder1, folder2):
+def content_matches(p1, p2, algorithm):
+    if p1.size != p2.size:
+        return False
+    digests = [p.digest if hasattr(p, "digest") else md5_of_file(p.path, algorithm) for p in (p1, p2)]
+    return digests[0] == digests[1]
+
+def show_matches(pairs, folder1, folder2, algorithm=None):
     if not pairs:
         print("No files with the same name found in both folders.")
         return
     print(f"Found {len(pairs)} file(s) present in both folders:\n")
     for p1, p2 in pairs:
-        same = md5_of_file(p1) == md5_of_file(p2)
+        if algorithm:
+            same = content_matches(p1, p2, algorithm)
+        else:
+            same = p1.size == p2.size and files_identical(p1.path, p2.path, algorithm=digest_algorithm)
         tag = "identical" if same else "DIFFER"
-        size1 = p1.stat().st_size
-        size2 = p2.stat().st_size
+        size1 = p1.size
+        size2 = p2.size
         size_note = "" if same else f" ({size1} vs {size2} bytes)"
         print(f"  {p1.name}  [{tag}]{size_note}")
 
 def main():
     folder1 = input("First folder to compare: ").strip()
     folder2 = input("Second folder to compare: ").strip()
+    if is_manifest(folder1) or is_manifest(folder2):
+        pairs, algorithm = find_files_in_both_with_manifest(folder1, folder2)
+        show_matches(pairs, folder1, folder2, algorithm)
+        return
     pairs, f1, f2 = find_files_in_both(folder1, folder2)
     show_matches(pairs, f1, f2)
+    hash_cache.prune(f1)
+    hash_cache.prune(f2)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,83 @@
+import os
+import gzip
+import argparse
+import urllib.parse
+from collections import namedtuple
+import hash_cache
+from digest_engine import file_digest
+from scanner import scan_files
+
+MANIFEST_SUFFIX = ".fman"
+FORMAT_VERSION = "1"
+
+ManifestEntry = namedtuple("ManifestEntry", "path name size mtime_ns digest")
+
+def is_manifest(path):
+    return os.fspath(path).endswith(MANIFEST_SUFFIX) and os.path.isfile(path)
+
+def open_manifest(path):
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def manifest_digest(path, algorithm):
+    return hash_cache.cached_digest(path, algorithm, lambda p: file_digest(p, algorithm))
+
+def write_manifest(root, out_path, algorithm="md5", recursive=True, compress=True):
+    root = os.path.realpath(os.path.expanduser(os.fspath(root)))
+    count = 0
+    tmp_path = os.fspath(out_path) + ".tmp"
+    opener = gzip.open(tmp_path, "wt", encoding="utf-8") if compress else open(tmp_path, "w", encoding="utf-8", newline="\n")
+    with opener as out:
+        out.write(f"# file-sort manifest v{FORMAT_VERSION}\talgorithm={algorithm}\troot={urllib.parse.quote(root)}\n")
+        for entry in scan_files(root, recursive):
+            try:
+                digest = manifest_digest(entry.path, algorithm)
+            except OSError as e:
+                print(f"Error hashing {entry.path}: {e}")
+                continue
+            rel = os.path.relpath(entry.path, root)
+            out.write(f"{urllib.parse.quote(rel)}\t{entry.size}\t{entry.mtime_ns}\t{digest}\n")
+            count += 1
+    os.replace(tmp_path, out_path)
+    return count
+
+def read_header(path):
+    with open_manifest(path) as f:
+        return parse_header(f.readline())
+
+def parse_header(line):
+    if not line.startswith("# file-sort manifest"):
+        raise ValueError("Not a file-sort manifest")
+    header = {}
+    for field in line.rstrip("\n").split("\t")[1:]:
+        key, _, value = field.partition("=")
+        header[key] = urllib.parse.unquote(value)
+    return header
+
+def read_manifest(path):
+    with open_manifest(path) as f:
+        parse_header(f.readline())
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            rel, size, mtime_ns, digest = line.rstrip("\n").split("\t")
+            rel = urllib.parse.unquote(rel)
+            yield ManifestEntry(rel, os.path.basename(rel), int(size), int(mtime_ns), digest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a file manifest (relative path, size, mtime, digest) for a folder")
+    parser.add_argument("--write-manifest", metavar="FOLDER", required=True, help="folder to describe")
+    parser.add_argument("-o", "--output", help=f"manifest file (default FOLDER{MANIFEST_SUFFIX})")
+    parser.add_argument("--algorithm", default="md5")
+    parser.add_argument("--flat", action="store_true", help="do not descend into subfolders")
+    parser.add_argument("--plain", action="store_true", help="write uncompressed text")
+    args = parser.parse_args()
+    output = args.output or os.path.abspath(args.write_manifest).rstrip(os.sep) + MANIFEST_SUFFIX
+    count = write_manifest(args.write_manifest, output, args.algorithm, not args.flat, not args.plain)
+    print(f"Wrote {count} entries to {output}")
+
+if __name__ == "__main__":
+    main()
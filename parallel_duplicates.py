@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from title_index import MAX_EDITS, candidate_pairs
+from title_scoring import pack_titles, score_pairs
+
+shared_state = {}
+
+def find_root(parent, x):
+    root = x
+    while parent[root] != root:
+        root = parent[root]
+    while parent[x] != root:
+        parent[x], x = root, parent[x]
+    return root
+
+def union(parent, a, b):
+    root_a = find_root(parent, a)
+    root_b = find_root(parent, b)
+    if root_a != root_b:
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+def share_array(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+def attach_array(spec):
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+def init_worker(codes_spec, lengths_spec, threshold):
+    codes_block, codes = attach_array(codes_spec)
+    lengths_block, lengths = attach_array(lengths_spec)
+    shared_state.update(blocks=(codes_block, lengths_block), codes=codes, lengths=lengths, threshold=threshold)
+
+def decode_row(codes, length):
+    if codes.dtype == np.uint8:
+        return codes[:length].tobytes().decode('latin-1')
+    return codes[:length].tobytes().decode('utf-32-le')
+
+def score_shard(bounds):
+    low, high = bounds
+    codes = shared_state['codes']
+    lengths = shared_state['lengths']
+    threshold = shared_state['threshold']
+    rows = np.nonzero((lengths >= low - MAX_EDITS) & (lengths <= high))[0]
+    titles = [decode_row(codes[row], lengths[row]) for row in rows]
+    packed = (codes[rows], lengths[rows])
+    matches = []
+    for a, b, score in score_pairs(packed, candidate_pairs(titles, threshold, (low, high))):
+        if score >= threshold:
+            matches.append((int(rows[a]), int(rows[b])))
+    return matches
+
+def length_shards(lengths, shard_count):
+    counts = np.bincount(lengths)
+    total = int(counts[1:].sum())
+    target = max(1, total // max(shard_count, 1))
+    shards = []
+    low = 1
+    running = 0
+    for length in range(1, len(counts)):
+        running += int(counts[length])
+        if running >= target:
+            shards.append((low, length))
+            low = length + 1
+            running = 0
+    if low < len(counts):
+        shards.append((low, len(counts) - 1))
+    return shards
+
+def similar_title_pairs(titles, threshold, workers):
+    codes, lengths = pack_titles(titles)
+    if threshold <= 0 or not len(titles):
+        shards = [(1, int(lengths.max(initial=0)) + MAX_EDITS)]
+    else:
+        shards = length_shards(lengths, workers * 4)
+    codes_block, codes_spec = share_array(codes)
+    lengths_block, lengths_spec = share_array(lengths)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(codes_spec, lengths_spec, threshold)) as pool:
+            for matches in pool.map(score_shard, shards):
+                yield from matches
+    finally:
+        for block in (codes_block, lengths_block):
+            block.close()
+            block.unlink()
+
+def group_similar_files_parallel(files, titles, title_of, threshold, workers=None):
+    if not len(titles):
+        return []
+    workers = workers or os.cpu_count() or 1
+    parent = list(range(len(titles)))
+    for a, b in similar_title_pairs(titles, threshold, workers):
+        union(parent, a, b)
+    title_roots = np.array([find_root(parent, t) for t in range(len(titles))], dtype=np.int32)
+    file_roots = np.where(title_of >= 0, title_roots[np.maximum(title_of, 0)], -1)
+    counts = np.bincount(file_roots[file_roots >= 0], minlength=len(titles))
+    keep = (file_roots >= 0) & (counts[np.maximum(file_roots, 0)] > 1)
+    members = {}
+    for idx in files.path_order():
+        if keep[idx]:
+            members.setdefault(int(file_roots[idx]), []).append(files[idx])
+    groups = list(members.values())
+    groups.sort(key=lambda group: group[0].path)
+    return groups
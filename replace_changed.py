@@ -1,75 +1,166 @@
-import os
 import sys
-import shutil
-import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import last_folder_helper
+import hash_cache
+from compare_files import files_identical
+from digest_engine import file_digest
+import copy_engine
+from copy_engine import copy_file
+from delta_sync import delta_update
+from snapshot import folder_entries, is_snapshot
+from manifest import is_manifest, read_header, read_manifest
 
 dry_run = False
+hash_workers = 8
+digest_algorithm = "md5"
+delta_updates = False
 
-def md5_of_file(path):
-    h = hashlib.md5()
-    with open(path, "rb") as f:
-        while True:
-            block = f.read(524288)
-            if not block:
-                break
-            h.update(block)
-    return h.hexdigest()
+def md5_of_file(path, algorithm=None):
+    algorithm = algorithm or digest_algorithm
+    return hash_cache.cached_digest(path, algorithm, lambda p: file_digest(p, algorithm))
 
-def smart_copy_flat(src_dir, dst_dir):
+def queue_compare(pool, src_path, dst_path):
+    if not dst_path.exists():
+        return None
+    return pool.submit(files_identical, src_path, dst_path, algorithm=digest_algorithm)
+
+def start_copy(src_path, dst_path, kind, counts, written, transfers, action=copy_file):
+    written.add(src_path.name)
+    future = transfers["pool"].submit(action, src_path, dst_path)
+    transfers["pending"].append((src_path.name, kind, future))
+    settle_copies(counts, transfers, transfers["limit"])
+
+def settle_copies(counts, transfers, limit=0):
+    pending = transfers["pending"]
+    while len(pending) > limit:
+        filename, kind, future = pending.popleft()
+        try:
+            result = future.result()
+            if result is not None:
+                counts["delta_bytes"] += result
+        except Exception as e:
+            if kind == "copied":
+                print(f"Error creating {filename}: {e}")
+            else:
+                print(f"Error replacing {filename}: {e}")
+            counts[kind] -= 1
+            counts["errors"] += 1
+
+def apply_decision(src_path, dst_path, future, counts, written, transfers):
+    filename = src_path.name
+    if filename in written:
+        settle_copies(counts, transfers)
+    if not dst_path.exists():
+        counts["copied"] += 1
+        print(f"{'Would create' if dry_run else 'Created  '} {filename}")
+        if not dry_run:
+            start_copy(src_path, dst_path, "copied", counts, written, transfers)
+        return
+    try:
+        if future is None or filename in written:
+            same = files_identical(src_path, dst_path, algorithm=digest_algorithm)
+        else:
+            same = future.result()
+    except Exception as e:
+        print(f"Error reading checksums for {filename}: {e}")
+        counts["errors"] += 1
+        return
+    if same:
+        counts["skipped"] += 1
+    else:
+        counts["replaced"] += 1
+        print(f"{'Would replace' if dry_run else 'Replaced '} {filename}  (different checksum)")
+        if delta_updates and dry_run:
+            try:
+                counts["delta_bytes"] += delta_update(src_path, dst_path, dry_run=True)
+            except Exception as e:
+                print(f"Error planning delta for {filename}: {e}")
+        elif delta_updates:
+            start_copy(src_path, dst_path, "replaced", counts, written, transfers, delta_update)
+        elif not dry_run:
+            start_copy(src_path, dst_path, "replaced", counts, written, transfers)
+
+def sync_paths(src_paths, dst, workers=None, copy_workers=None):
+    workers = max(1, workers or hash_workers)
+    copy_workers = max(1, copy_workers or copy_engine.default_workers)
+    counts = {"copied": 0, "skipped": 0, "replaced": 0, "errors": 0, "delta_bytes": 0}
+    written = set()
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=copy_workers) as copy_pool:
+        transfers = {"pool": copy_pool, "pending": deque(), "limit": copy_workers * 2}
+        for src_path in src_paths:
+            dst_path = dst / src_path.name
+            pending.append((src_path, dst_path, queue_compare(pool, src_path, dst_path)))
+            if len(pending) >= workers * 4:
+                apply_decision(*pending.popleft(), counts, written, transfers)
+        while pending:
+            apply_decision(*pending.popleft(), counts, written, transfers)
+        settle_copies(counts, transfers)
+    return counts
+
+def compare_with_manifest(src_entries, manifest_path):
+    algorithm = read_header(manifest_path).get("algorithm", "md5")
+    sources = list(src_entries)
+    wanted = {entry.name for entry in sources}
+    remote = {}
+    for entry in read_manifest(manifest_path):
+        if entry.path == entry.name and entry.name in wanted:
+            remote[entry.name] = entry
+    counts = {"copied": 0, "skipped": 0, "replaced": 0, "errors": 0, "delta_bytes": 0}
+    for entry in sources:
+        other = remote.get(entry.name)
+        if other is None:
+            counts["copied"] += 1
+            print(f"Would create {entry.name}")
+            continue
+        if other.size == entry.size:
+            try:
+                same = md5_of_file(entry.path, algorithm) == other.digest
+            except OSError as e:
+                print(f"Error reading checksums for {entry.name}: {e}")
+                counts["errors"] += 1
+                continue
+            if same:
+                counts["skipped"] += 1
+                continue
+        counts["replaced"] += 1
+        print(f"Would replace {entry.name}  (different checksum)")
+    return counts
+
+def smart_copy_flat(src_dir, dst_dir, workers=None, copy_workers=None):
     src = Path(src_dir).expanduser().resolve()
     dst = Path(dst_dir).expanduser().resolve()
-    if not src.is_dir():
+    if is_manifest(src):
+        print(f"Source must be a folder or snapshot, not a manifest: {src}")
+        sys.exit(1)
+    if not src.is_dir() and not is_snapshot(src):
         print(f"Source is not a directory: {src}")
         sys.exit(1)
-    if not dry_run:
-        dst.mkdir(parents=True, exist_ok=True)
-    copied = 0
-    skipped = 0
-    replaced = 0
-    errors = 0
-    for src_path in src.rglob("*"):
-        if not src_path.is_file():
-            continue
-        filename = src_path.name
-        dst_path = dst / filename
-        if not dst_path.exists():
-            copied += 1
-            print(f"{'Would create' if dry_run else 'Created  '} {filename}")
-            if not dry_run:
-                try:
-                    shutil.copy2(src_path, dst_path)
-                except Exception as e:
-                    print(f"Error creating {filename}: {e}")
-                    copied -= 1
-                    errors += 1
-            continue
-        try:
-            src_md5 = md5_of_file(src_path)
-            dst_md5 = md5_of_file(dst_path)
-        except Exception as e:
-            print(f"Error reading checksums for {filename}: {e}")
-            errors += 1
-            continue
-        if src_md5 == dst_md5:
-            skipped += 1
-        else:
-            replaced += 1
-            print(f"{'Would replace' if dry_run else 'Replaced '} {filename}  (different checksum)")
-            if not dry_run:
-                try:
-                    shutil.copy2(src_path, dst_path)
-                except Exception as e:
-                    print(f"Error replacing {filename}: {e}")
-                    replaced -= 1
-                    errors += 1
-    mode_label = "DRY RUN - " if dry_run else ""
+    src_root, src_entries = folder_entries(src, recursive=True)
+    if is_manifest(dst):
+        print("Destination is a manifest, comparing only")
+        counts = compare_with_manifest(src_entries, dst)
+    else:
+        if not dry_run:
+            dst.mkdir(parents=True, exist_ok=True)
+        counts = sync_paths((Path(entry.path) for entry in src_entries), dst, workers, copy_workers)
+    print_summary(counts, dry_run or is_manifest(dst))
+
+def print_summary(counts, preview):
+    copied = counts["copied"]
+    skipped = counts["skipped"]
+    replaced = counts["replaced"]
+    errors = counts["errors"]
+    mode_label = "DRY RUN - " if preview else ""
     print(f"\n{mode_label}Summary:")
-    print(f"  New files {'to be ' if dry_run else ''}created:     {copied}")
-    print(f"  {'Would be replaced' if dry_run else 'Replaced'} (different):  {replaced}")
+    print(f"  New files {'to be ' if preview else ''}created:     {copied}")
+    print(f"  {'Would be replaced' if preview else 'Replaced'} (different):  {replaced}")
     print(f"  Skipped (identical):   {skipped}")
     print(f"  Errors:                {errors}")
+    if delta_updates:
+        print(f"  Delta bytes {'to transfer' if preview else 'transferred'}: {counts['delta_bytes']}")
     print(f"  Total source files:    {copied + replaced + skipped + errors}")
 
 if __name__ == "__main__":
@@ -79,5 +170,7 @@ if __name__ == "__main__":
     destination_dir = user_input or default_destination
     last_folder_helper.save_last_folder(destination_dir)
     smart_copy_flat(source, destination_dir)
+    hash_cache.prune(source)
+    hash_cache.prune(destination_dir)
     print(f'Source: {source}, destination: {destination_dir}')
 
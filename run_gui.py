@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 import os
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from zipfile import ZipFile
 from io import BytesIO
 from PIL import Image, ImageTk
+import copy_engine
+from scanner import scan_files
 
 class FileSorterApp:
     def __init__(self, root):
@@ -17,6 +19,8 @@ class FileSorterApp:
         self.num_buckets = 5
         self.target_dirs = {}
         self.photo = None
+        self.copy_pool = ThreadPoolExecutor(max_workers=copy_engine.default_workers)
+        self.pending_copies = []
         self.label_info = tk.Label(root, text="Source folder not selected yet", font=("Segoe UI", 11))
         self.label_info.pack(pady=12)
         self.btn_choose = tk.Label(root, text="Click to choose folder to sort", fg="blue", cursor="hand2", font=("Segoe UI", 12))
@@ -50,8 +54,7 @@ class FileSorterApp:
         self.source_dir = folder
         self.label_info.config(text=f"Folder: {folder}")
         try:
-            self.files = [f for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f))]
-            self.files.sort()
+            self.files = sorted(entry.name for entry in scan_files(folder))
         except Exception as e:
             messagebox.showerror("Error", f"Cannot read folder\n{e}")
             return
@@ -105,15 +108,35 @@ class FileSorterApp:
         current_path = os.path.join(self.source_dir, self.files[self.current_idx])
         target_folder = self.target_dirs[bucket_key]
         target_path = os.path.join(target_folder, self.files[self.current_idx])
-        try:
-            shutil.copy2(current_path, target_path)
-        except Exception as e:
-            messagebox.showerror("Error", f"Cannot copy file\n{e}")
-            return
+        future = self.copy_pool.submit(copy_engine.copy_file, current_path, target_path)
+        self.pending_copies.append((self.files[self.current_idx], future))
+        if len(self.pending_copies) == 1:
+            self.root.after(200, self.check_copies)
         self.current_idx += 1
         self.label_progress.config(text=f"{self.current_idx}/{len(self.files)} files processed")
         self.next_file()
 
+    def check_copies(self):
+        still_running = []
+        failed = []
+        for fname, future in self.pending_copies:
+            if not future.done():
+                still_running.append((fname, future))
+                continue
+            error = future.exception()
+            if error:
+                failed.append(fname)
+                messagebox.showerror("Error", f"Cannot copy file {fname}\n{error}\n\nIt will be shown again at the end.")
+        self.pending_copies = still_running
+        if failed:
+            finished = self.current_idx >= len(self.files)
+            self.files.extend(failed)
+            self.label_progress.config(text=f"{self.current_idx}/{len(self.files)} files processed")
+            if finished:
+                self.next_file()
+        if self.pending_copies:
+            self.root.after(200, self.check_copies)
+
     def next_file(self):
         if self.current_idx >= len(self.files):
             self.label_filename.config(text="All files processed.")
@@ -170,4 +193,5 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = FileSorterApp(root)
     root.mainloop()
+    app.copy_pool.shutdown(wait=True)
 
@@ -0,0 +1,51 @@
+import os
+from collections import namedtuple, deque
+
+FileEntry = namedtuple("FileEntry", "path name size mtime_ns inode dev")
+
+def entry_stem(entry):
+    return os.path.splitext(entry.name)[0]
+
+def normalize_extensions(extensions):
+    if not extensions:
+        return None
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    return tuple(e.lower() if e.startswith('.') else '.' + e.lower() for e in extensions)
+
+def scan_files(root, recursive=False, extensions=None, symlinks="files"):
+    extensions = normalize_extensions(extensions)
+    follow_files = symlinks in ("files", "follow")
+    follow_dirs = symlinks == "follow"
+    pending = deque([os.fspath(root)])
+    seen_dirs = set()
+    while pending:
+        folder = pending.popleft()
+        try:
+            iterator = os.scandir(folder)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                try:
+                    is_link = entry.is_symlink()
+                    if is_link and not follow_files and not follow_dirs:
+                        continue
+                    if entry.is_dir(follow_symlinks=follow_dirs):
+                        if not recursive:
+                            continue
+                        if follow_dirs:
+                            st = entry.stat()
+                            if (st.st_dev, st.st_ino) in seen_dirs:
+                                continue
+                            seen_dirs.add((st.st_dev, st.st_ino))
+                        pending.append(entry.path)
+                        continue
+                    if extensions and not entry.name.lower().endswith(extensions):
+                        continue
+                    if not entry.is_file(follow_symlinks=follow_files):
+                        continue
+                    st = entry.stat(follow_symlinks=follow_files)
+                except OSError:
+                    continue
+                yield FileEntry(entry.path, entry.name, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
@@ -1,2 +1,5 @@
 mtp_base = "mtp://Rakuten_Kobo_Inc._tolino_vision_6/Interner gemeinsamer Speicher/Books/"
 COPY_DELAY = 5
+MIN_COPY_DELAY = 0.5
+MAX_COPY_DELAY = 60
+MAX_BATCH_FILES = 16
@@ -0,0 +1,139 @@
+import os
+import gzip
+import json
+from collections import deque
+import hash_cache
+from scanner import FileEntry, scan_files
+
+SNAPSHOT_SUFFIX = ".fsnap"
+digest_algorithm = "md5"
+trust_dir_mtime = True
+
+def is_snapshot(path):
+    return os.fspath(path).endswith(SNAPSHOT_SUFFIX) and os.path.isfile(path)
+
+def load_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_snapshot(snapshot, path):
+    tmp_path = os.fspath(path) + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def list_dir(full, previous_files):
+    files = {}
+    subdirs = []
+    with os.scandir(full) as iterator:
+        for entry in iterator:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            record = [st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev, None]
+            old = previous_files.get(entry.name)
+            if old and old[:4] == record[:4]:
+                record[4] = old[4]
+            files[entry.name] = record
+    return files, sorted(subdirs)
+
+def take_snapshot(root, previous=None):
+    root = os.path.realpath(os.path.expanduser(os.fspath(root)))
+    old_dirs = previous["dirs"] if previous and previous.get("root") == root else {}
+    dirs = {}
+    diff = {"added": [], "removed": [], "modified": []}
+    reused = 0
+    pending = deque([""])
+    while pending:
+        rel = pending.popleft()
+        full = os.path.join(root, rel) if rel else root
+        try:
+            mtime_ns = os.stat(full).st_mtime_ns
+        except OSError:
+            continue
+        old = old_dirs.get(rel)
+        if old and trust_dir_mtime and old[0] == mtime_ns:
+            files, subdirs = old[1], old[2]
+            reused += 1
+        else:
+            try:
+                files, subdirs = list_dir(full, old[1] if old else {})
+            except OSError:
+                continue
+        for name, record in files.items():
+            if record[4] is None:
+                record[4] = hash_cache.lookup_key(record[3], record[2], record[0], record[1], digest_algorithm)
+        dirs[rel] = [mtime_ns, files, subdirs]
+        old_files = old[1] if old else {}
+        for name, record in files.items():
+            old_record = old_files.get(name)
+            if old_record is None:
+                diff["added"].append(os.path.join(rel, name))
+            elif old_record[:2] != record[:2]:
+                diff["modified"].append(os.path.join(rel, name))
+        for name in old_files:
+            if name not in files:
+                diff["removed"].append(os.path.join(rel, name))
+        pending.extend(os.path.join(rel, sub) if rel else sub for sub in subdirs)
+    for rel, old in old_dirs.items():
+        if rel not in dirs:
+            diff["removed"].extend(os.path.join(rel, name) for name in old[1])
+    return {"root": root, "algorithm": digest_algorithm, "dirs": dirs}, diff, reused
+
+def refresh_snapshot(snapshot_path, root=None):
+    previous = load_snapshot(snapshot_path) if os.path.isfile(snapshot_path) else None
+    root = root or (previous or {}).get("root")
+    if root is None or not os.path.isdir(root):
+        return previous, None
+    snapshot, diff, _ = take_snapshot(root, previous)
+    save_snapshot(snapshot, snapshot_path)
+    return snapshot, diff
+
+def snapshot_entries(snapshot, recursive=True):
+    root = snapshot["root"]
+    for rel, (_, files, _) in snapshot["dirs"].items():
+        if rel and not recursive:
+            continue
+        folder = os.path.join(root, rel) if rel else root
+        for name, (size, mtime_ns, inode, dev, _) in files.items():
+            yield FileEntry(os.path.join(folder, name), name, size, mtime_ns, inode, dev)
+
+def load_entries(snapshot_path, recursive=True):
+    snapshot, _ = refresh_snapshot(snapshot_path)
+    return snapshot["root"], list(snapshot_entries(snapshot, recursive))
+
+def folder_entries(path, recursive=False):
+    if is_snapshot(path):
+        return load_entries(path, recursive)
+    root = os.path.realpath(os.path.expanduser(os.fspath(path)))
+    return root, scan_files(root, recursive)
+
+def print_diff(diff, limit=20):
+    for kind in ("added", "removed", "modified"):
+        paths = sorted(diff[kind])
+        print(f"{kind.capitalize()}: {len(paths)}")
+        for path in paths[:limit]:
+            print(f"  {path}")
+        if len(paths) > limit:
+            print("  ...")
+
+def main():
+    folder = input("Folder to snapshot: ").strip()
+    default_path = os.path.abspath(os.path.expanduser(folder)).rstrip(os.sep) + SNAPSHOT_SUFFIX
+    snapshot_path = input(f"Snapshot file ({default_path}): ").strip() or default_path
+    previous = load_snapshot(snapshot_path) if os.path.isfile(snapshot_path) else None
+    snapshot, diff, reused = take_snapshot(folder, previous)
+    save_snapshot(snapshot, snapshot_path)
+    file_count = sum(len(files) for _, files, _ in snapshot["dirs"].values())
+    print(f"{file_count} files in {len(snapshot['dirs'])} folders, {reused} folders reused unchanged")
+    if previous:
+        print_diff(diff)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import random
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+from copy_to_tolino import copy_to_tolino
+from device_manifest import load_device_manifest
+from transfer_scheduler import RateController, MIB
+from transport import LocalTransport
+from settings import COPY_DELAY
+
+STRATEGIES = {
+    "fixed": lambda: RateController(delay=COPY_DELAY, min_delay=COPY_DELAY, max_delay=COPY_DELAY, max_batch=1),
+    "adaptive": lambda: RateController(delay=COPY_DELAY),
+}
+
+def make_library(folder, count, min_kb, max_kb, rng):
+    files = []
+    for idx in range(count):
+        path = Path(folder) / f"Book {idx:05d}.epub"
+        path.write_bytes(rng.randbytes(rng.randint(min_kb, max_kb) * 1024 + idx))
+        files.append(str(path))
+    return files
+
+def make_transport(folder, args, seed):
+    return LocalTransport(folder, latency=args.latency, file_latency=args.file_latency,
+                          throughput=args.throughput * MIB if args.throughput else None,
+                          failure_rate=args.failure_rate, min_gap=args.min_gap,
+                          overload_failure_rate=args.overload_failure_rate,
+                          virtual_time=not args.real_time, seed=seed,
+                          refuse_overwrite=args.refuse_overwrite,
+                          partial_failure_rate=args.partial_failure_rate)
+
+def run_scenario(name, files, device, args):
+    os.makedirs(device)
+    rng = random.Random(args.seed)
+    for path in rng.sample(files, int(len(files) * args.present)):
+        Path(device, os.path.basename(path)).write_bytes(Path(path).read_bytes())
+    transport = make_transport(device, args, args.seed)
+    start = transport.clock()
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        stats = copy_to_tolino(files, COPY_DELAY, False, transport, STRATEGIES[name]())
+    elapsed = transport.clock() - start
+    on_device = {entry.name: entry.stat().st_size for entry in os.scandir(device)}
+    missing = sum(1 for path in files if on_device.get(os.path.basename(path)) != os.path.getsize(path))
+    print(f"{name:>9}: {elapsed:9.1f}s  {stats['files']:5d} sent  {stats['batches']:5d} calls  "
+          f"{stats['retries']:4d} retried  {stats['failed']:4d} failed  {stats['waited']:8.1f}s throttled  {missing} not on device")
+
+def run_listing(device, args):
+    transport = make_transport(device, args, args.seed)
+    for label in ("cold", "cached"):
+        start = transport.clock()
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            manifest = load_device_manifest(transport, use_cache=label == "cached")
+        print(f"  listing ({label}): {len(manifest)} files, {transport.clock() - start:.2f}s, {transport.calls} device calls so far")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a device sync against a simulated MTP device")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--min-kb", type=int, default=20)
+    parser.add_argument("--max-kb", type=int, default=300)
+    parser.add_argument("--present", type=float, default=0.2, help="fraction of books already on the device")
+    parser.add_argument("--latency", type=float, default=1.5, help="seconds per device call")
+    parser.add_argument("--file-latency", type=float, default=0.3, help="extra seconds per file in a call")
+    parser.add_argument("--throughput", type=float, default=4.0, help="MB/s, 0 for unlimited")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--min-gap", type=float, default=0.5, help="calls closer together than this count as overload")
+    parser.add_argument("--overload-failure-rate", type=float, default=0.1)
+    parser.add_argument("--refuse-overwrite", action="store_true", help="fail copies onto an existing file, like some MTP devices")
+    parser.add_argument("--partial-failure-rate", type=float, default=0.0, help="chance a copied file is left truncated and the call fails")
+    parser.add_argument("--strategies", default="fixed,adaptive")
+    parser.add_argument("--real-time", action="store_true", help="actually sleep instead of using a simulated clock")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as work:
+        os.environ["XDG_CACHE_HOME"] = os.path.join(work, "cache")
+        os.makedirs(os.path.join(work, "library"))
+        files = make_library(os.path.join(work, "library"), args.files, args.min_kb, args.max_kb, rng)
+        print(f"{len(files)} books, {sum(os.path.getsize(p) for p in files) / MIB:.1f} MB, {args.present:.0%} already on device")
+        for name in args.strategies.split(","):
+            run_scenario(name.strip(), files, os.path.join(work, f"device-{name.strip()}"), args)
+        run_listing(os.path.join(work, f"device-{args.strategies.split(',')[0].strip()}"), args)
+
+if __name__ == "__main__":
+    main()
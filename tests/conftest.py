@@ -0,0 +1,64 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hash_cache
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setitem(hash_cache.state, "conn", None)
+    monkeypatch.setitem(hash_cache.state, "pending", 0)
+    yield
+    if hash_cache.state["conn"] is not None:
+        hash_cache.state["conn"].close()
+
+def make_titles(count, seed, alphabet="abcde ", min_len=1, max_len=14):
+    rng = random.Random(seed)
+    base = ["".join(rng.choice(alphabet) for _ in range(rng.randint(min_len, max_len))) for _ in range(count // 2)]
+    titles = list(base)
+    for title in base:
+        chars = list(title)
+        for _ in range(rng.randint(0, 3)):
+            op = rng.randrange(3)
+            pos = rng.randrange(len(chars) + 1)
+            if op == 0:
+                chars.insert(pos, rng.choice(alphabet))
+            elif op == 1 and pos < len(chars):
+                del chars[pos]
+            elif pos < len(chars):
+                chars[pos] = rng.choice(alphabet)
+        titles.append("".join(chars))
+    return sorted(title for title in set(titles) if title)
+
+@pytest.fixture
+def random_titles():
+    return make_titles
+
+@pytest.fixture
+def library(tmp_path):
+    rng = random.Random(0)
+    folder = tmp_path / "library"
+    folder.mkdir()
+    paths = []
+    for idx in range(6):
+        path = folder / f"Book {idx:03d}.epub"
+        path.write_bytes(rng.randbytes(1000 + 37 * idx))
+        paths.append(str(path))
+    return paths
+
+@pytest.fixture
+def device(tmp_path):
+    path = tmp_path / "device"
+    path.mkdir()
+    return path
+
+def device_files(device):
+    return {entry.name: entry.stat().st_size for entry in os.scandir(device)}
+
+@pytest.fixture
+def on_device():
+    return device_files
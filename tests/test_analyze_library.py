@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("last_folder_helper")
+
+import analyze_library
+import snapshot
+
+def test_changed_sees_nested_files_in_one_flat_scan(tmp_path, monkeypatch):
+    source = tmp_path / "source"
+    (source / "sub").mkdir(parents=True)
+    (source / "top.epub").write_bytes(b"top")
+    (source / "sub" / "nested.epub").write_bytes(b"nested")
+    target = tmp_path / "target"
+    target.mkdir()
+    scans = []
+    original = snapshot.folder_entries
+    def counting(path, recursive=False):
+        scans.append((str(path), recursive))
+        return original(path, recursive)
+    monkeypatch.setattr("catalog.folder_entries", counting)
+    reports = tmp_path / "reports"
+    analyze_library.main([str(source), str(target), "--run", "changed,missing", "--reports", str(reports)])
+    assert sorted(scans) == sorted([(str(source), True), (str(target), False)])
+    changed = (reports / "changed.txt").read_text()
+    assert "created:     2" in changed
+    missing = (reports / "missing.txt").read_text()
+    assert "top.epub" in missing
+    assert "nested.epub" not in missing
@@ -0,0 +1,38 @@
+import os
+import random
+import pytest
+import copy_engine
+
+def write_random(path, size, seed):
+    data = random.Random(seed).randbytes(size)
+    path.write_bytes(data)
+    return data
+
+@pytest.mark.parametrize("size", [0, 1, 4095, 65536, 1048576 + 17])
+def test_copy_file_round_trip(tmp_path, size):
+    src = tmp_path / "src.bin"
+    data = write_random(src, size, size)
+    dst = tmp_path / "dst.bin"
+    copy_engine.copy_file(src, dst)
+    assert dst.read_bytes() == data
+    assert os.stat(dst).st_mtime_ns == os.stat(src).st_mtime_ns
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".partial")] == []
+
+def test_copy_file_move_removes_source(tmp_path):
+    src = tmp_path / "src.bin"
+    data = write_random(src, 5000, 1)
+    dst = tmp_path / "dst.bin"
+    copy_engine.copy_file(src, dst, move=True)
+    assert not src.exists()
+    assert dst.read_bytes() == data
+
+def test_transfer_all_reports_errors(tmp_path):
+    good = tmp_path / "good.bin"
+    write_random(good, 100, 2)
+    missing = tmp_path / "missing.bin"
+    out = tmp_path / "out"
+    out.mkdir()
+    results = list(copy_engine.transfer_all([(good, out / "good.bin"), (missing, out / "missing.bin")], workers=2))
+    assert results[0][2] is None
+    assert isinstance(results[1][2], OSError)
+    assert (out / "good.bin").read_bytes() == good.read_bytes()
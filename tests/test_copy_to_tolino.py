@@ -0,0 +1,38 @@
+import os
+import copy_to_tolino
+from device_manifest import load_cached
+from transport import LocalTransport
+
+def test_copy_to_empty_device_then_rerun(library, device, on_device):
+    transport = LocalTransport(device, virtual_time=True)
+    stats = copy_to_tolino.copy_to_tolino(library, 1, False, transport)
+    assert stats["files"] == len(library)
+    assert len(load_cached(transport)) == len(library)
+    stats = copy_to_tolino.copy_to_tolino(library, 1, False, transport)
+    assert stats["files"] == 0
+    assert on_device(device) == {os.path.basename(p): os.path.getsize(p) for p in library}
+
+def test_cached_list_is_used_while_the_folder_is_unchanged(library, device, capsys):
+    transport = LocalTransport(device, virtual_time=True)
+    copy_to_tolino.copy_to_tolino(library[:3], 1, False, transport)
+    capsys.readouterr()
+    calls = transport.calls
+    copy_to_tolino.copy_to_tolino(library[:3], 1, False, transport)
+    assert "using cached file list" in capsys.readouterr().out
+    assert transport.calls == calls
+
+def test_partial_copies_are_removed_and_sent_again(library, device, on_device):
+    transport = LocalTransport(device, virtual_time=True, refuse_overwrite=True, partial_failure_rate=1.0)
+    stats = copy_to_tolino.copy_to_tolino(library, 1, False, transport)
+    assert stats["failed"] == len(library)
+    assert on_device(device) == {}
+    transport.partial_failure_rate = 0.0
+    stats = copy_to_tolino.copy_to_tolino(library, 1, False, transport)
+    assert stats["failed"] == 0
+    assert on_device(device) == {os.path.basename(p): os.path.getsize(p) for p in library}
+
+def test_unknown_device_state_is_not_cached(library, device, monkeypatch):
+    transport = LocalTransport(device, virtual_time=True, partial_failure_rate=1.0)
+    monkeypatch.setattr(transport, "stat", lambda name: None)
+    copy_to_tolino.copy_to_tolino(library[:1], 1, False, transport)
+    assert load_cached(transport).stamp != transport.stamp()
@@ -0,0 +1,51 @@
+import random
+import pytest
+from delta_sync import delta_update, plan_delta
+
+def edit(data, seed):
+    rng = random.Random(seed)
+    data = bytearray(data)
+    for _ in range(5):
+        pos = rng.randrange(len(data))
+        op = rng.randrange(3)
+        chunk = rng.randbytes(rng.randint(1, 3000))
+        if op == 0:
+            data[pos:pos] = chunk
+        elif op == 1:
+            del data[pos:pos + len(chunk)]
+        else:
+            data[pos:pos + len(chunk)] = chunk
+    return bytes(data)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_delta_update_round_trip(tmp_path, seed):
+    old = random.Random(seed).randbytes(300000)
+    new = edit(old, seed + 100)
+    src = tmp_path / "new.bin"
+    dst = tmp_path / "old.bin"
+    src.write_bytes(new)
+    dst.write_bytes(old)
+    literal = delta_update(src, dst)
+    assert dst.read_bytes() == new
+    assert literal < len(new)
+
+def test_delta_update_in_place_and_shrink(tmp_path):
+    old = random.Random(9).randbytes(200000)
+    new = old[:50000] + b"x" * 100 + old[50100:150000]
+    src = tmp_path / "new.bin"
+    dst = tmp_path / "old.bin"
+    src.write_bytes(new)
+    dst.write_bytes(old)
+    plan = plan_delta(src, dst)
+    assert all(op[0] == "data" or op[1] == op[2] for op in plan["ops"])
+    delta_update(src, dst)
+    assert dst.read_bytes() == new
+
+def test_delta_update_dry_run_leaves_target(tmp_path):
+    src = tmp_path / "new.bin"
+    dst = tmp_path / "old.bin"
+    src.write_bytes(random.Random(1).randbytes(50000))
+    old = random.Random(2).randbytes(50000)
+    dst.write_bytes(old)
+    assert delta_update(src, dst, dry_run=True) == 50000
+    assert dst.read_bytes() == old
@@ -0,0 +1,55 @@
+import zipfile
+import pytest
+from catalog import build_catalog
+from find_duplicates import normalize_title
+from epub_metadata import cached_metadata, find_metadata_duplicates, read_metadata
+import hash_cache
+
+CONTAINER = """<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>
+<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>"""
+
+def make_epub(path, title="A Book", creator="Jane Doe", identifier="urn:isbn:0-306-40615-2", container=CONTAINER, opf=None):
+    opf = opf or f"""<package xmlns="http://www.idpf.org/2007/opf">
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>{title}</dc:title>
+<dc:creator>{creator}</dc:creator><dc:identifier>{identifier}</dc:identifier><meta name="cover" content="img"/></metadata>
+<manifest><item id="img" href="images/cover.jpg"/></manifest></package>"""
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("META-INF/container.xml", container)
+        zf.writestr("OEBPS/content.opf", opf)
+    return path
+
+def test_read_metadata(tmp_path):
+    meta = read_metadata(make_epub(tmp_path / "a.epub"))
+    assert meta["title"] == "A Book"
+    assert meta["creators"] == ["Jane Doe"]
+    assert meta["isbn"] == "9780306406157"
+    assert meta["cover"] == "OEBPS/images/cover.jpg"
+
+@pytest.mark.parametrize("container", ["not xml at all", "<container/>", ""])
+def test_malformed_epub_is_skipped(tmp_path, container):
+    path = make_epub(tmp_path / "bad.epub", container=container)
+    assert cached_metadata(path) is None
+
+def test_not_a_zip_is_skipped(tmp_path):
+    path = tmp_path / "bad.epub"
+    path.write_bytes(b"plain text")
+    assert cached_metadata(path) is None
+
+def test_metadata_is_cached_in_its_own_table(tmp_path):
+    path = make_epub(tmp_path / "a.epub")
+    cached_metadata(path)
+    conn = hash_cache.connect()
+    assert conn.execute("SELECT count(*) FROM metadata").fetchone()[0] == 1
+    assert conn.execute("SELECT count(*) FROM hashes").fetchone()[0] == 0
+
+def test_duplicates_by_isbn_and_by_title_author(tmp_path):
+    folder = tmp_path / "books"
+    folder.mkdir()
+    make_epub(folder / "one.epub")
+    make_epub(folder / "two.epub", title="Other Title", identifier="978-0-306-40615-7")
+    make_epub(folder / "three.epub", title="A  book!", identifier="none")
+    make_epub(folder / "four.epub", title="Unrelated", identifier="none")
+    make_epub(folder / "broken.epub", container="not xml at all")
+    files = build_catalog([folder])
+    groups = find_metadata_duplicates(files, normalize_title)
+    assert [sorted(entry.name for entry in group) for group in groups] == [["one.epub", "three.epub", "two.epub"]]
@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+
+import gio_listing
+
+@pytest.fixture
+def fake_gio(tmp_path, monkeypatch):
+    script = tmp_path / "gio"
+    script.write_text(f"""#!{sys.executable}
+import sys
+sys.stderr.write("e" * 200000)
+for idx in range(3):
+    print(f"book{{idx}}.epub\\t{{idx}}\\t(regular)")
+sys.exit(1 if sys.argv[-1] == "fail" else 0)
+""")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+def test_large_stderr_does_not_block_listing(fake_gio):
+    assert [entry.name for entry in gio_listing.stream_listing("ok")] == ["book0.epub", "book1.epub", "book2.epub"]
+
+def test_failed_listing_reports_stderr(fake_gio):
+    with pytest.raises(RuntimeError, match="eeee"):
+        list(gio_listing.stream_lines("fail"))
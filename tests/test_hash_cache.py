@@ -0,0 +1,37 @@
+import os
+import hash_cache
+from digest_engine import file_digest
+
+def digest_all(paths, reads):
+    def compute(path):
+        reads.append(path)
+        return file_digest(path, "md5")
+    return [hash_cache.cached_digest(path, "md5", compute) for path in paths]
+
+def test_second_run_reads_nothing(library):
+    reads = []
+    first = digest_all(library, reads)
+    assert len(reads) == len(library)
+    reads.clear()
+    assert digest_all(library, reads) == first
+    assert reads == []
+
+def test_changed_file_is_hashed_again(library):
+    reads = []
+    digest_all(library, reads)
+    with open(library[0], "ab") as f:
+        f.write(b"more")
+    st = os.stat(library[0])
+    os.utime(library[0], ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+    reads.clear()
+    digests = digest_all(library, reads)
+    assert reads == [library[0]]
+    assert digests[0] == file_digest(library[0], "md5")
+
+def test_prune_drops_deleted_files(library):
+    digest_all(library, [])
+    os.unlink(library[0])
+    assert hash_cache.prune(os.path.dirname(library[0])) == 1
+    reads = []
+    digest_all(library[1:], reads)
+    assert reads == []
@@ -0,0 +1,39 @@
+import pytest
+
+import list_missing
+
+def write(folder, name, data):
+    folder.mkdir(exist_ok=True)
+    (folder / name).write_bytes(data)
+
+@pytest.fixture
+def sides(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    write(a, "Same Name.epub", b"one")
+    write(b, "same name.epub", b"changed")
+    write(a, "Renamed.epub", b"renamed content")
+    write(b, "Other Title.epub", b"renamed content")
+    write(a, "The Title.pdf", b"pdf")
+    write(b, "the  title!.epub", b"epub")
+    write(a, "Colour Book.epub", b"colour")
+    write(b, "Color Book.epub", b"color")
+    return list_missing.get_entries(a, False), list_missing.get_entries(b, False)
+
+def missing_names(sides, mode, fuzzy=None):
+    return sorted(entry.name for entry in list_missing.find_missing(*sides, mode, fuzzy))
+
+def test_name_mode(sides):
+    assert missing_names(sides, "name") == ["Colour Book.epub", "Renamed.epub", "The Title.pdf"]
+
+def test_title_mode(sides):
+    assert missing_names(sides, "title") == ["Colour Book.epub", "Renamed.epub"]
+
+def test_content_mode(sides):
+    assert missing_names(sides, "content") == ["Colour Book.epub", "Same Name.epub", "The Title.pdf"]
+
+def test_both_mode(sides):
+    assert missing_names(sides, "both") == ["Colour Book.epub"]
+
+def test_fuzzy_pass_matches_leftovers(sides):
+    assert missing_names(sides, "both", 0.8) == []
+    assert missing_names(sides, "name", 0.99) == ["Colour Book.epub", "Renamed.epub"]
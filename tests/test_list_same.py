@@ -0,0 +1,43 @@
+import os
+import random
+import pytest
+
+pytest.importorskip("last_folder_helper")
+
+import list_same
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+@pytest.fixture
+def folders(tmp_path):
+    data = random.Random(1).randbytes(300000)
+    write(tmp_path / "a" / "book.epub", data)
+    write(tmp_path / "b" / "copy.epub", data)
+    write(tmp_path / "b" / "other.epub", data[:-1] + b"x")
+    return [tmp_path / "a", tmp_path / "b"]
+
+def test_full_hash_report_counts_only_cache_misses(folders, capsys):
+    groups = list(list_same.find_identical_in_roots(folders))
+    assert [sorted(entry.name for _, entry in group) for group in groups] == [["book.epub", "copy.epub"]]
+    assert "Full hashes covered 0.6 MB" in capsys.readouterr().out
+    list(list_same.find_identical_in_roots(folders))
+    assert "Full hashes covered 0.0 MB" in capsys.readouterr().out
+
+def test_relink_hardlinks_identical_copies(folders):
+    groups = list(list_same.find_identical_in_roots(folders))
+    assert list_same.relink_duplicates(groups, "hardlink") == 300000
+    book, copy = folders[0] / "book.epub", folders[1] / "copy.epub"
+    assert os.stat(book).st_ino == os.stat(copy).st_ino
+    assert os.stat(folders[1] / "other.epub").st_nlink == 1
+
+def test_relink_skips_file_changed_after_scan(folders, capsys):
+    groups = list(list_same.find_identical_in_roots(folders))
+    copy = folders[1] / "copy.epub"
+    copy.write_bytes(copy.read_bytes()[:-1] + b"y")
+    assert list_same.relink_duplicates(groups, "hardlink") == 0
+    assert "changed since the scan" in capsys.readouterr().out
+    assert os.stat(copy).st_ino != os.stat(folders[0] / "book.epub").st_ino
+    assert copy.read_bytes()[-1:] == b"y"
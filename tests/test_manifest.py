@@ -0,0 +1,19 @@
+import os
+from manifest import write_manifest, read_manifest, read_header
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return root
+
+def test_manifest_round_trip(tmp_path):
+    root = make_tree(tmp_path / "a", {"x.epub": b"one", "sub/y é.epub": b"two!"})
+    out = tmp_path / "a.fman"
+    assert write_manifest(root, out) == 2
+    assert read_header(out)["root"] == os.path.realpath(root)
+    entries = {entry.path: entry for entry in read_manifest(out)}
+    assert sorted(entries) == ["sub/y é.epub", "x.epub"]
+    assert entries["sub/y é.epub"].name == "y é.epub"
+    assert entries["x.epub"].size == 3
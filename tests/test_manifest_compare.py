@@ -0,0 +1,39 @@
+import pytest
+from manifest import write_manifest
+
+pytest.importorskip("last_folder_helper")
+
+import list_same
+import list_same_by_name
+import replace_changed
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return root
+
+def test_list_same_compares_two_manifests(tmp_path):
+    make_tree(tmp_path / "a", {"x.epub": b"same", "y.epub": b"only a"})
+    make_tree(tmp_path / "b", {"z.epub": b"same", "w.epub": b"only b!"})
+    write_manifest(tmp_path / "a", tmp_path / "a.fman")
+    write_manifest(tmp_path / "b", tmp_path / "b.fman")
+    groups, _, _ = list_same.find_identical_with_manifest(tmp_path / "a.fman", tmp_path / "b.fman")
+    assert [sorted((source, entry.name) for source, entry in group) for group in groups] == [[(0, "x.epub"), (1, "z.epub")]]
+
+def test_list_same_labels_by_source_when_roots_match(tmp_path):
+    root = make_tree(tmp_path / "a", {"x.epub": b"same"})
+    write_manifest(root, tmp_path / "a.fman")
+    groups, _, _ = list_same.find_identical_with_manifest(root, tmp_path / "a.fman")
+    assert sorted(source for source, _ in groups[0]) == [0, 1]
+
+def test_nested_manifest_entries_do_not_match_a_flat_folder(tmp_path):
+    make_tree(tmp_path / "remote", {"sub/y.epub": b"nested", "y.epub": b"top"})
+    make_tree(tmp_path / "local", {"y.epub": b"new top"})
+    write_manifest(tmp_path / "remote", tmp_path / "remote.fman")
+    pairs, _ = list_same_by_name.find_files_in_both_with_manifest(tmp_path / "local", tmp_path / "remote.fman")
+    assert [(a.name, b.path) for a, b in pairs] == [("y.epub", "y.epub")]
+    _, sources = replace_changed.folder_entries(tmp_path / "local", recursive=True)
+    counts = replace_changed.compare_with_manifest(sources, tmp_path / "remote.fman")
+    assert counts["replaced"] == 1
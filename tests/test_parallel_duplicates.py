@@ -0,0 +1,31 @@
+import os
+from catalog import build_catalog
+from find_duplicates import group_similar_files, title_table
+from parallel_duplicates import group_similar_files_parallel
+
+def make_folder(folder, names):
+    folder.mkdir()
+    for name in names:
+        (folder / name).write_bytes(name.encode("utf-8"))
+    return build_catalog([folder])
+
+def group_paths(groups):
+    return sorted(sorted(os.path.basename(entry.path) for entry in group) for group in groups)
+
+def test_parallel_grouper_handles_files_without_titles(tmp_path):
+    files = make_folder(tmp_path / "books", ["日本語.epub", "中文.epub", "한국어.pdf"])
+    titles, title_of = title_table(files)
+    assert titles == []
+    assert group_similar_files_parallel(files, titles, title_of, 0.92, 2) == []
+    assert group_similar_files(files, 0.92) == []
+
+def test_parallel_grouper_matches_serial(tmp_path):
+    names = ["The Hobbit.epub", "The Hobit.epub", "the hobbit.pdf", "Dune.epub", "Dune Messiah.epub",
+             "Emma.epub", "Emma (1).epub", "日本語.epub", "A Tale of Two Cities.epub", "A Tale of Two Citys.epub"]
+    files = make_folder(tmp_path / "books", names)
+    titles, title_of = title_table(files)
+    for threshold in (0.8, 0.92):
+        serial = group_similar_files(files, threshold)
+        parallel = group_similar_files_parallel(files, titles, title_of, threshold, 2)
+        assert group_paths(parallel) == group_paths(serial)
+        assert serial
@@ -0,0 +1,55 @@
+import os
+import snapshot
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def tree(tmp_path):
+    root = tmp_path / "books"
+    write(root / "top.epub", b"top")
+    write(root / "a" / "one.epub", b"one")
+    write(root / "a" / "two.epub", b"two")
+    write(root / "b" / "three.epub", b"three")
+    write(root / "c" / "gone.epub", b"gone")
+    return root
+
+def test_rescan_reports_changes_and_reuses_unchanged_folders(tmp_path):
+    root = tree(tmp_path)
+    first, diff, reused = snapshot.take_snapshot(root)
+    assert len(diff["added"]) == 5 and reused == 0
+    write(root / "a" / "one.epub", b"one, edited")
+    (root / "a" / "two.epub").unlink()
+    write(root / "a" / "four.epub", b"four")
+    (root / "c" / "gone.epub").unlink()
+    (root / "c").rmdir()
+    second, diff, reused = snapshot.take_snapshot(root, first)
+    assert sorted(diff["added"]) == [os.path.join("a", "four.epub")]
+    assert sorted(diff["modified"]) == [os.path.join("a", "one.epub")]
+    assert sorted(diff["removed"]) == [os.path.join("a", "two.epub"), os.path.join("c", "gone.epub")]
+    assert reused == 1
+    assert sorted(second["dirs"]) == ["", "a", "b"]
+
+def test_symlinked_root_matches_its_target(tmp_path):
+    root = tree(tmp_path)
+    link = tmp_path / "link"
+    link.symlink_to(root)
+    first, _, _ = snapshot.take_snapshot(root)
+    second, diff, reused = snapshot.take_snapshot(link, first)
+    assert second["root"] == os.path.realpath(root)
+    assert diff == {"added": [], "removed": [], "modified": []}
+    assert reused == len(first["dirs"])
+
+def test_snapshot_file_serves_flat_and_recursive_entries(tmp_path):
+    root = tree(tmp_path)
+    path = tmp_path / ("books" + snapshot.SNAPSHOT_SUFFIX)
+    snapshot.save_snapshot(snapshot.take_snapshot(root)[0], path)
+    write(root / "new.epub", b"new")
+    found_root, flat = snapshot.folder_entries(path)
+    assert found_root == os.path.realpath(root)
+    assert sorted(entry.name for entry in flat) == ["new.epub", "top.epub"]
+    _, deep = snapshot.folder_entries(path, recursive=True)
+    assert len(deep) == 6
+    assert snapshot.load_snapshot(path)["dirs"][""][1].keys() == {"new.epub", "top.epub"}
@@ -0,0 +1,28 @@
+import pytest
+from find_duplicates import title_similarity
+from title_index import candidate_pairs, cross_candidates
+
+@pytest.mark.parametrize("threshold", [0.0, 0.6, 0.75, 0.92])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_candidate_pairs_cover_every_baseline_match(random_titles, threshold, seed):
+    titles = random_titles(160, seed)
+    candidates = set(candidate_pairs(titles, threshold))
+    for a in range(len(titles)):
+        for b in range(a + 1, len(titles)):
+            if title_similarity(titles[a], titles[b]) >= threshold:
+                assert (a, b) in candidates
+
+def test_candidate_pairs_are_unique_and_ordered(random_titles):
+    pairs = list(candidate_pairs(random_titles(120, 3), 0.75))
+    assert len(pairs) == len(set(pairs))
+    assert all(a < b for a, b in pairs)
+
+@pytest.mark.parametrize("threshold", [0.6, 0.92])
+def test_cross_candidates_cover_every_baseline_match(random_titles, threshold):
+    queries = random_titles(100, 4)
+    targets = random_titles(100, 5)
+    pairs = cross_candidates(queries, targets, threshold)
+    for q, query in enumerate(queries):
+        for t, target in enumerate(targets):
+            if title_similarity(query, target) >= threshold:
+                assert (q, t) in pairs
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from find_duplicates import title_similarity
+from title_index import candidate_pairs
+from title_scoring import pack_titles, score_pairs, batch_similarity
+
+@pytest.mark.parametrize("threshold", [0.0, 0.6, 0.75, 0.92])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_scored_candidates_equal_baseline_matches(random_titles, threshold, seed):
+    titles = random_titles(160, seed)
+    expected = {}
+    for a in range(len(titles)):
+        for b in range(a + 1, len(titles)):
+            score = title_similarity(titles[a], titles[b])
+            if score >= threshold:
+                expected[(a, b)] = score
+    found = {(a, b): score for a, b, score in score_pairs(pack_titles(titles), candidate_pairs(titles, threshold)) if score >= threshold}
+    assert found.keys() == expected.keys()
+    for pair, score in found.items():
+        assert score == pytest.approx(expected[pair])
+
+def test_batch_similarity_matches_baseline_with_wide_characters(random_titles):
+    titles = random_titles(80, 3, alphabet="aäbßc€ ")
+    packed = pack_titles(titles)
+    for query in titles[:20]:
+        expected = np.array([title_similarity(query, title) for title in titles], dtype=float)
+        assert np.allclose(batch_similarity(query, packed), expected)
+
+def test_small_chunks_give_the_same_scores(random_titles):
+    titles = random_titles(60, 6)
+    pairs = list(candidate_pairs(titles, 0.6))
+    packed = pack_titles(titles)
+    assert list(score_pairs(packed, pairs, chunk_size=7)) == list(score_pairs(packed, pairs))
@@ -0,0 +1,42 @@
+import os
+import pytest
+import tolino_replace_changed
+from transport import LocalTransport
+
+def test_empty_device_then_rerun(library, device, capsys):
+    transport = LocalTransport(device, virtual_time=True)
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    assert "6 new, 0 replaced, 0 skipped, 0 failed" in capsys.readouterr().out
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    assert "0 new, 0 replaced, 6 skipped, 0 failed" in capsys.readouterr().out
+
+@pytest.mark.parametrize("refuse_overwrite", [False, True])
+def test_replaces_modified_books(library, device, capsys, on_device, refuse_overwrite):
+    transport = LocalTransport(device, virtual_time=True, refuse_overwrite=refuse_overwrite)
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    with open(library[0], "ab") as f:
+        f.write(b"changed")
+    capsys.readouterr()
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    out = capsys.readouterr().out
+    assert "0 new, 1 replaced, 5 skipped, 0 failed" in out
+    assert ("by remove" in out) == refuse_overwrite
+    assert on_device(device)[os.path.basename(library[0])] == os.path.getsize(library[0])
+
+def test_records_truncated_copy(library, device, capsys, on_device):
+    transport = LocalTransport(device, virtual_time=True, partial_failure_rate=1.0)
+    tolino_replace_changed.copy_to_tolino(library[:1], False, transport)
+    assert "1 failed" in capsys.readouterr().out
+    transport.partial_failure_rate = 0.0
+    tolino_replace_changed.copy_to_tolino(library[:1], False, transport)
+    assert "0 new, 1 replaced, 0 skipped, 0 failed" in capsys.readouterr().out
+    assert on_device(device)[os.path.basename(library[0])] == os.path.getsize(library[0])
+
+def test_random_device_errors_do_not_stop_the_run(library, device, capsys, on_device):
+    transport = LocalTransport(device, virtual_time=True, failure_rate=0.3, seed=2)
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    out = capsys.readouterr().out
+    assert "Finished:" in out
+    transport.failure_rate = 0.0
+    tolino_replace_changed.copy_to_tolino(library, False, transport)
+    assert on_device(device) == {os.path.basename(p): os.path.getsize(p) for p in library}
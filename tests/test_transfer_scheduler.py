@@ -0,0 +1,26 @@
+import os
+import copy_to_tolino
+from transport import LocalTransport
+from transfer_scheduler import RateController, send_files
+
+def test_retries_after_partial_batch_on_refusing_device(library, device, on_device):
+    transport = LocalTransport(device, virtual_time=True, refuse_overwrite=True, partial_failure_rate=0.3, seed=3)
+    stats = copy_to_tolino.copy_to_tolino(library, 1, False, transport)
+    files = on_device(device)
+    complete = [p for p in library if files.get(os.path.basename(p)) == os.path.getsize(p)]
+    assert stats["retries"]
+    assert stats["files"] == len(complete)
+    assert stats["failed"] == len(library) - len(complete)
+
+def test_failed_listing_after_a_batch_still_retries_every_file(library, device, on_device, monkeypatch):
+    transport = LocalTransport(device, virtual_time=True)
+    def fail(*args, **kwargs):
+        raise RuntimeError("simulated device error")
+    monkeypatch.setattr(transport, "copy_many", fail)
+    monkeypatch.setattr(transport, "list", fail)
+    controller = RateController(delay=1)
+    controller.batch_size = 4
+    jobs = [(p, os.path.basename(p), os.path.getsize(p)) for p in library]
+    results = list(send_files(jobs, transport, controller))
+    assert [error for *_, error in results] == [None] * len(library)
+    assert on_device(device) == {os.path.basename(p): os.path.getsize(p) for p in library}
@@ -0,0 +1,31 @@
+import pytest
+from transport import LocalTransport
+
+def test_local_transport_copy_list_and_delete(library, device):
+    transport = LocalTransport(device, virtual_time=True, latency=1.0)
+    transport.copy_many(library[:2])
+    transport.copy(library[2], "renamed.epub")
+    listed = transport.list()
+    assert sorted(listed) == ["Book 000.epub", "Book 001.epub", "renamed.epub"]
+    assert transport.stat("renamed.epub") == listed["renamed.epub"]
+    transport.delete("renamed.epub")
+    assert transport.stat("renamed.epub") is None
+    assert transport.clock() == pytest.approx(transport.calls * 1.0)
+
+def test_refused_overwrite(library, device):
+    transport = LocalTransport(device, virtual_time=True, refuse_overwrite=True)
+    transport.copy(library[0], "a.epub")
+    with pytest.raises(RuntimeError, match="already exists"):
+        transport.copy(library[1], "a.epub")
+
+def test_partial_write_leaves_truncated_file(library, device):
+    transport = LocalTransport(device, virtual_time=True, partial_failure_rate=1.0)
+    with pytest.raises(RuntimeError, match="truncated"):
+        transport.copy(library[0], "a.epub")
+    assert 0 < (device / "a.epub").stat().st_size < 1000
+
+def test_failed_stat_returns_none_like_gio(library, device):
+    transport = LocalTransport(device, virtual_time=True)
+    transport.copy(library[0], "a.epub")
+    transport.failure_rate = 1.0
+    assert transport.stat("a.epub") is None
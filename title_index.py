@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+MAX_EDITS = 3
+SEGMENTS = MAX_EDITS + 1
+
+def segment_layout(length):
+    prefix_len = length - MAX_EDITS
+    if prefix_len < SEGMENTS:
+        return None
+    base = prefix_len // SEGMENTS
+    extra = prefix_len % SEGMENTS
+    layout = []
+    pos = 0
+    for idx in range(SEGMENTS):
+        seg_len = base + (1 if idx >= SEGMENTS - extra else 0)
+        layout.append((idx, pos, seg_len))
+        pos += seg_len
+    return layout
+
+def length_can_match(short_len, long_len, threshold):
+    if threshold <= 0:
+        return True
+    diff = long_len - short_len
+    if diff < 0 or diff > MAX_EDITS:
+        return False
+    return max(1, diff) <= (1.0 - threshold) * long_len + 1e-9
+
+def segment_keys(title):
+    length = len(title)
+    layout = segment_layout(length)
+    if layout is None:
+        return [(length, -1, '')]
+    return [(length, idx, title[pos:pos + seg_len]) for idx, pos, seg_len in layout]
+
+def probe_keys(title, threshold):
+    length = len(title)
+    keys = []
+    for short_len in range(max(1, length - MAX_EDITS), length + 1):
+        if not length_can_match(short_len, length, threshold):
+            continue
+        layout = segment_layout(short_len)
+        if layout is None:
+            keys.append((short_len, -1, ''))
+            continue
+        max_shift = MAX_EDITS if short_len < length else 0
+        for idx, pos, seg_len in layout:
+            for shift in range(max_shift + 1):
+                start = pos + shift
+                if start + seg_len > length:
+                    break
+                keys.append((short_len, idx, title[start:start + seg_len]))
+    return keys
+
+def build_index(titles):
+    index = defaultdict(set)
+    for title_id, title in enumerate(titles):
+        if not title:
+            continue
+        for key in segment_keys(title):
+            index[key].add(title_id)
+    return index
+
+def candidates_for(title, index, threshold):
+    found = set()
+    for key in probe_keys(title, threshold):
+        ids = index.get(key)
+        if ids:
+            found.update(ids)
+    return found
+
+def candidate_lists(titles, threshold, probe_lengths=None):
+    low, high = probe_lengths or (1, float('inf'))
+    if threshold <= 0:
+        ids = [i for i, t in enumerate(titles) if t]
+        for pos, title_id in enumerate(ids):
+            others = [other_id for other_id in ids[pos + 1:] if low <= max(len(titles[title_id]), len(titles[other_id])) <= high]
+            if others:
+                yield title_id, others
+        return
+    index = build_index(titles)
+    for title_id, title in enumerate(titles):
+        if not title or not low <= len(title) <= high:
+            continue
+        others = []
+        for other_id in candidates_for(title, index, threshold):
+            if other_id == title_id:
+                continue
+            if len(titles[other_id]) == len(title) and other_id < title_id:
+                continue
+            others.append(other_id)
+        if others:
+            others.sort()
+            yield title_id, others
+
+def candidate_pairs(titles, threshold, probe_lengths=None):
+    for title_id, others in candidate_lists(titles, threshold, probe_lengths):
+        for other_id in others:
+            yield min(title_id, other_id), max(title_id, other_id)
+
+def cross_candidates(queries, titles, threshold):
+    if threshold <= 0:
+        return {(qi, ti) for qi, q in enumerate(queries) if q for ti, t in enumerate(titles) if t}
+    pairs = set()
+    ids_by_title = defaultdict(list)
+    for title_id, title in enumerate(titles):
+        ids_by_title[title].append(title_id)
+    for query_id, query in enumerate(queries):
+        if query:
+            pairs.update((query_id, title_id) for title_id in ids_by_title.get(query, ()))
+    title_index = build_index(titles)
+    for query_id, query in enumerate(queries):
+        if query:
+            pairs.update((query_id, title_id) for title_id in candidates_for(query, title_index, threshold))
+    query_index = build_index(queries)
+    for title_id, title in enumerate(titles):
+        if title:
+            pairs.update((query_id, title_id) for query_id in candidates_for(title, query_index, threshold))
+    return pairs
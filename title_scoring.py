@@ -0,0 +1,81 @@
+import numpy as np
+
+MAX_EDITS = 3
+
+def encode_title(title, dtype):
+    if dtype == np.uint8:
+        return np.frombuffer(title.encode('latin-1'), dtype=np.uint8)
+    return np.frombuffer(title.encode('utf-32-le'), dtype=np.uint32)
+
+def pack_titles(titles):
+    width = max((len(t) for t in titles), default=0)
+    wide = any(ord(c) > 255 for t in titles for c in t)
+    dtype = np.uint32 if wide else np.uint8
+    codes = np.zeros((len(titles), max(width, 1)), dtype=dtype)
+    lengths = np.zeros(len(titles), dtype=np.int64)
+    for row, title in enumerate(titles):
+        if title:
+            codes[row, :len(title)] = encode_title(title, dtype)
+            lengths[row] = len(title)
+    return codes, lengths
+
+def greedy_scores(codes_a, len_a, codes_b, len_b):
+    count = len(len_b)
+    scores = np.zeros(count, dtype=np.float64)
+    if not count:
+        return scores
+    live = (len_a > 0) & (len_b > 0) & (np.abs(len_b - len_a) <= MAX_EDITS)
+    i = np.zeros(count, dtype=np.int64)
+    j = np.zeros(count, dtype=np.int64)
+    distance = np.zeros(count, dtype=np.int64)
+    a_longer = len_a > len_b
+    b_longer = len_b > len_a
+    row_ids = np.arange(count)
+    last_a = codes_a.shape[1] - 1
+    last_b = codes_b.shape[1] - 1
+    active = live & (i < len_a) & (j < len_b)
+    while active.any():
+        same = codes_a[row_ids, np.minimum(i, last_a)] == codes_b[row_ids, np.minimum(j, last_b)]
+        distance += active & ~same
+        i += active & (same | ~b_longer)
+        j += active & (same | ~a_longer)
+        live &= distance <= MAX_EDITS
+        active = live & (i < len_a) & (j < len_b)
+    distance += np.abs(len_a - i) + np.abs(len_b - j)
+    max_len = np.maximum(len_a, len_b)
+    similarity = 1.0 - distance[live] / max_len[live]
+    scores[live] = np.where(similarity > 0, similarity, 0.0)
+    return scores
+
+def batch_similarity(query, packed, rows=None):
+    codes, lengths = packed
+    if rows is not None:
+        rows = np.asarray(rows, dtype=np.int64)
+        codes = codes[rows]
+        lengths = lengths[rows]
+    if not query or not len(lengths):
+        return np.zeros(len(lengths), dtype=np.float64)
+    if codes.dtype == np.uint8 and any(ord(c) > 255 for c in query):
+        codes = codes.astype(np.uint32)
+    query_codes = encode_title(query, codes.dtype.type)
+    query_codes = np.broadcast_to(query_codes, (len(lengths), len(query_codes)))
+    return greedy_scores(query_codes, np.full(len(lengths), len(query)), codes, lengths)
+
+def pair_similarity(packed, rows_a, rows_b):
+    codes, lengths = packed
+    rows_a = np.asarray(rows_a, dtype=np.int64)
+    rows_b = np.asarray(rows_b, dtype=np.int64)
+    return greedy_scores(codes[rows_a], lengths[rows_a], codes[rows_b], lengths[rows_b])
+
+def score_pairs(packed, pairs, chunk_size=262144):
+    rows_a = []
+    rows_b = []
+    for a, b in pairs:
+        rows_a.append(a)
+        rows_b.append(b)
+        if len(rows_a) >= chunk_size:
+            yield from zip(rows_a, rows_b, pair_similarity(packed, rows_a, rows_b))
+            rows_a = []
+            rows_b = []
+    if rows_a:
+        yield from zip(rows_a, rows_b, pair_similarity(packed, rows_a, rows_b))
@@ -1,49 +1,53 @@
-import subprocess
-import urllib.parse
-from copy_to_tolino import run_gio
+from device_manifest import load_cached
+from gio_listing import stream_lines, parse_line, list_recursive
+from transport import GioTransport
+from settings import mtp_base
 
 LIST_ALL_FILES = False
+LIST_RECURSIVE = False
+RAW_LINES = 8
 
 def fetch_gio_listing(mtp_base):
-    cmd = ["gio", "list", "-l", mtp_base]
-    return run_gio(cmd)
-
-def parse_gio_line(line):
-    line = line.rstrip("\n")
-    if not line:
-        return None, None
-    tab_parts = line.split("\t")
-    if len(tab_parts) >= 2 and tab_parts[1].isdigit():
-        name_encoded = tab_parts[0]
-        size = int(tab_parts[1])
-        return urllib.parse.unquote(name_encoded), size
-    space_parts = line.split(maxsplit=1)
-    if len(space_parts) == 2 and space_parts[0].isdigit():
-        size = int(space_parts[0])
-        name_encoded = space_parts[1]
-        return urllib.parse.unquote(name_encoded), size
-    return None, None
+    return stream_lines(mtp_base)
 
 def is_book_file(filename):
     return filename.lower().endswith(('.epub', '.pdf'))
 
-def collect_files(raw_output, list_all=False):
+def collect_files(raw_lines, list_all=False, raw_limit=0):
     files_by_name = {}
     skipped_count = 0
     zero_byte_count = 0
-    for raw_line in raw_output.splitlines():
-        decoded_name, size = parse_gio_line(raw_line)
-        if decoded_name is None or size is None:
+    line_count = 0
+    for raw_line in raw_lines:
+        if line_count < raw_limit:
+            line = raw_line.rstrip("\n")
+            print(f"Line {line_count}: {repr(line)}")
+        line_count += 1
+        entry = parse_line(raw_line)
+        if entry is None:
             if raw_line.strip():
                 print(f"SKIPPED (unexpected format): {repr(raw_line)}")
                 skipped_count += 1
             continue
-        if size == 0:
+        if entry.size == 0:
             zero_byte_count += 1
             continue
-        files_by_name[decoded_name] = size
+        files_by_name[entry.name] = entry.size
+    if line_count > raw_limit:
+        print(f"...")
     return files_by_name, skipped_count, zero_byte_count
 
+def collect_files_recursive(base):
+    counts = {}
+    files_by_name = {}
+    zero_byte_count = 0
+    for entry in list_recursive(base, counts=counts):
+        if entry.size == 0:
+            zero_byte_count += 1
+            continue
+        files_by_name[entry.name] = entry.size
+    return files_by_name, counts.get("skipped", 0), zero_byte_count
+
 def print_diagnostics(files_by_name, skipped_count, zero_byte_count, list_all=False):
     if skipped_count > 0:
         print(f"\n{skipped_count} lines skipped due to unexpected format")
@@ -54,26 +58,39 @@ def print_diagnostics(files_by_name, skipped_count, zero_byte_count, list_all=Fa
         if list_all:
             print("All parsed files (decoded name, size):")
             for name, size in sorted(files_by_name.items()):
-                print(f"Size: {size} bytes, name: {name.replace(".epub", "").replace(".pdf", "")[:50]}")
+                print(f"Size: {size} bytes, name: {name.replace('.epub', '').replace('.pdf', '')[:50]}")
         else:
             print("First 10 book files (decoded name,  size):")
             for i, (name, size) in enumerate(list(files_by_name.items())[:10]):
-                print(f"Size: {size} bytes, name: {name.replace(".epub", "").replace(".pdf", "")[:50]}")
+                print(f"Size: {size} bytes, name: {name.replace('.epub', '').replace('.pdf', '')[:50]}")
+
+def print_manifest_state(files_by_name, transport=None):
+    transport = transport or GioTransport(mtp_base)
+    cached = load_cached(transport)
+    if cached is None:
+        print("\nNo cached device manifest")
+        return
+    stamp = transport.stamp()
+    print(f"\nCached device manifest: {len(cached)} files, stamp {cached.stamp}, device stamp {stamp}")
+    print("Cache would be reused" if stamp is not None and stamp == cached.stamp else "Cache would be refreshed")
+    listed = {name: size for name, size in files_by_name.items() if is_book_file(name)}
+    missing = sorted(set(listed) - set(cached.files))
+    stale = sorted(set(cached.files) - set(listed))
+    changed = sorted(name for name in set(listed) & set(cached.files) if listed[name] != cached.size_of(name))
+    print(f"Not in cache: {len(missing)}, no longer on device: {len(stale)}, size changed: {len(changed)}")
+    for name in (missing + stale + changed)[:10]:
+        print(f"  {name}")
 
 def main():
-    mtp_base = "mtp://Rakuten_Kobo_Inc._tolino_vision_6/Interner gemeinsamer Speicher/Books/"
-    lim = 8
     print("Fetching file list from device...")
-    raw_output = fetch_gio_listing(mtp_base)
-    print(f"Raw output from gio:")
-    lines = raw_output.splitlines()
-    for i, line in enumerate(lines[:lim]):
-        print(f"Line {i}: {repr(line)}")
-    if len(lines) > lim:
-        print(f"...")
+    if LIST_RECURSIVE:
+        files_by_name, skipped, zeros = collect_files_recursive(mtp_base)
+    else:
+        print(f"Raw output from gio:")
+        files_by_name, skipped, zeros = collect_files(fetch_gio_listing(mtp_base), LIST_ALL_FILES, RAW_LINES)
     print("\nParsed files:")
-    files_by_name, skipped, zeros = collect_files(raw_output, list_all=LIST_ALL_FILES)
     print_diagnostics(files_by_name, skipped, zeros, list_all=LIST_ALL_FILES)
+    print_manifest_state({name: size for name, size in files_by_name.items() if "/" not in name})
 
 if __name__ == "__main__":
     main()
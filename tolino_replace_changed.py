@@ -1,30 +1,44 @@
-import time
 import random
-import subprocess
-import tempfile
 from pathlib import Path
-import urllib.parse
-from copy_to_tolino import list_remote_files, ask_yes_no
-from settings import mtp_base, COPY_DELAY
+from copy_to_tolino import ask_yes_no
+from device_manifest import load_device_manifest
+from transfer_scheduler import RateController
+from transport import GioTransport
+from settings import COPY_DELAY
 
-def delete_remote_file(remote_name):
-    remote_filename_encoded = urllib.parse.quote(remote_name)
-    remote_uri = mtp_base + remote_filename_encoded
-    with tempfile.NamedTemporaryFile(suffix=Path(remote_name).suffix, delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-    try:
-        result = subprocess.run(["gio", "copy", str(tmp_path), remote_uri], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip())
-        time.sleep(COPY_DELAY)
-    finally:
-        tmp_path.unlink(missing_ok=True)
+REPLACE_MODES = ("overwrite", "remove")
+
+def replace_remote_file(local_path, remote_name, local_size, transport, preferred=None):
+    modes = [preferred] + [m for m in REPLACE_MODES if m != preferred] if preferred else list(REPLACE_MODES)
+    errors = []
+    for mode in modes:
+        try:
+            if mode == "remove":
+                transport.delete(remote_name)
+            transport.copy(local_path, remote_name)
+        except RuntimeError as e:
+            errors.append(f'{mode}: {e}')
+            continue
+        remote_size = transport.stat(remote_name)
+        if remote_size == local_size:
+            return mode
+        errors.append(f'{mode}: device reports {remote_size} bytes, expected {local_size}')
+    raise RuntimeError('; '.join(errors))
+
+def wait_for_device(transport, controller, last_transfer):
+    if last_transfer is None:
+        return
+    remaining = controller.delay - (transport.clock() - last_transfer)
+    if remaining > 0:
+        transport.sleep(remaining)
 
-def copy_to_tolino(files_to_send, randomize):
+def copy_to_tolino(files_to_send, randomize, transport=None, controller=None):
+    transport = transport or GioTransport()
+    controller = controller or RateController(delay=COPY_DELAY)
     print('Reading file list from device...')
     try:
-        existing_by_name = list_remote_files()
-        print(f'Found {len(existing_by_name)} files on device')
+        manifest = load_device_manifest(transport)
+        print(f'Found {len(manifest)} files on device')
     except RuntimeError as e:
         print(f'ERROR: Could not read device file list: {e}')
         return
@@ -37,6 +51,8 @@ def copy_to_tolino(files_to_send, randomize):
     skipped = 0
     failed = 0
     failed_files = []
+    replace_mode = None
+    last_transfer = None
     total_files = len(files_list)
     for index, local_path_str in enumerate(files_list, 1):
         local_path = Path(local_path_str)
@@ -54,44 +70,43 @@ def copy_to_tolino(files_to_send, randomize):
             failed += 1
             failed_files.append(str(local_path))
             continue
-        needs_delete = False
-        if remote_name in existing_by_name:
-            if existing_by_name[remote_name] == local_size:
+        needs_replace = False
+        if remote_name in manifest:
+            if manifest.size_of(remote_name) == local_size:
                 print(f'Already present: {remote_name}')
                 skipped += 1
                 continue
-            needs_delete = True
-        remote_filename_encoded = urllib.parse.quote(remote_name)
-        remote_uri = mtp_base + remote_filename_encoded
+            needs_replace = True
         book_name = remote_name.replace(".epub", "").replace(".pdf", "")[:50]
-        if needs_delete:
-            print(f'Deleting outdated remote: {book_name}')
-            try:
-                delete_remote_file(remote_name)
-            except RuntimeError as e:
-                print(f'ERROR: delete-via-copy failed: {e}')
-                failed += 1
-                failed_files.append(str(local_path))
-                continue
-            print(f'Replacing {book_name} ({local_size} bytes)')
-        else:
-            print(f'Copying {book_name} ({local_size} bytes)')
-        cmd = ["gio", "copy", str(local_path), remote_uri]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f'  copied')
-            if needs_delete:
-                replaced += 1
+        wait_for_device(transport, controller, last_transfer)
+        started = transport.clock()
+        try:
+            if needs_replace:
+                print(f'Replacing {book_name} ({local_size} bytes)')
+                mode = replace_remote_file(local_path, remote_name, local_size, transport, replace_mode)
+                if mode != replace_mode:
+                    print(f'  device accepts replacement by {mode}')
+                    replace_mode = mode
             else:
-                copied += 1
-            existing_by_name[remote_name] = local_size
-            if index < total_files:
-                time.sleep(COPY_DELAY)
-        else:
-            error_msg = result.stderr.strip()
-            print(f'ERROR: copying failed: {error_msg}')
+                print(f'Copying {book_name} ({local_size} bytes)')
+                transport.copy(local_path, remote_name)
+        except RuntimeError as e:
+            last_transfer = transport.clock()
+            controller.failure()
+            print(f'ERROR: {"replacing" if needs_replace else "copying"} failed: {e}')
             failed += 1
             failed_files.append(str(local_path))
+            manifest.check(remote_name)
+            continue
+        last_transfer = transport.clock()
+        controller.success(local_size, last_transfer - started)
+        print(f'  copied')
+        if needs_replace:
+            replaced += 1
+        else:
+            copied += 1
+        manifest.add(remote_name, local_size)
+    manifest.save()
     print(f'\nFinished: {copied} new, {replaced} replaced, {skipped} skipped, {failed} failed')
     if failed_files:
         print('Failed files:')
@@ -108,7 +123,7 @@ if __name__ == "__main__":
     epub_files = [str(p) for p in source_dir.glob("*.epub")]
     pdf_files  = [str(p) for p in source_dir.glob("*.pdf")]
     all_files = sorted(epub_files + pdf_files)
-    print(f'Delay {COPY_DELAY} seconds')
+    print(f'Initial delay {COPY_DELAY} seconds, adjusted to how fast the device keeps up')
     if not all_files:
         print('No files found')
     else:
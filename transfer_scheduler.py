@@ -0,0 +1,127 @@
+import os
+import time
+from collections import deque
+from settings import COPY_DELAY, MIN_COPY_DELAY, MAX_COPY_DELAY, MAX_BATCH_FILES
+
+MIB = 1048576
+batch_bytes = 64 * MIB
+base_timeout = 60
+slow_factor = 2.0
+
+class RateController:
+    def __init__(self, delay=COPY_DELAY, min_delay=MIN_COPY_DELAY, max_delay=MAX_COPY_DELAY, max_batch=MAX_BATCH_FILES):
+        self.initial_delay = delay
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.batch_size = 1
+        self.seconds_per_unit = None
+
+    def units(self, size, count=1):
+        return max(size, count * MIB) / MIB
+
+    def timeout_for(self, size, count=1):
+        expected = self.units(size, count) * (self.seconds_per_unit or 2.0)
+        return base_timeout + 4 * expected
+
+    def success(self, size, seconds, count=1):
+        cost = seconds / self.units(size, count)
+        if self.seconds_per_unit is not None and cost > slow_factor * self.seconds_per_unit:
+            self.delay = min(self.max_delay, max(self.delay, self.min_delay) * 1.5)
+            self.batch_size = max(1, self.batch_size // 2)
+        else:
+            self.delay = max(self.min_delay, self.delay * 0.7)
+            self.batch_size = min(self.max_batch, self.batch_size * 2)
+        self.seconds_per_unit = cost if self.seconds_per_unit is None else 0.7 * self.seconds_per_unit + 0.3 * cost
+
+    def failure(self):
+        self.delay = min(self.max_delay, max(self.delay * 2, self.initial_delay))
+        self.batch_size = 1
+
+def new_stats(clock=time.monotonic):
+    return {"files": 0, "bytes": 0, "failed": 0, "retries": 0, "batches": 0, "busy": 0.0, "waited": 0.0, "clock": clock, "started": clock()}
+
+def take_batch(pending, limit):
+    batch = [pending.popleft()]
+    names = {batch[0][1]}
+    total = batch[0][2]
+    while pending and len(batch) < limit and not batch[0][3]:
+        local_path, remote_name, size, retry = pending[0]
+        if retry or remote_name in names or remote_name != os.path.basename(local_path) or total + size > batch_bytes:
+            break
+        batch.append(pending.popleft())
+        names.add(remote_name)
+        total += size
+    return batch, total
+
+def landed_files(transport):
+    try:
+        return transport.list()
+    except RuntimeError:
+        return None
+
+def run_copy(batch, transport, timeout, partial):
+    try:
+        if len(batch) == 1:
+            local_path, remote_name, size, retry = batch[0]
+            if remote_name in partial:
+                transport.delete(remote_name)
+                partial.discard(remote_name)
+            transport.copy(local_path, remote_name, timeout)
+        else:
+            transport.copy_many([job[0] for job in batch], timeout)
+    except RuntimeError as e:
+        return str(e)
+    return None
+
+def send_files(jobs, transport, controller=None, stats=None):
+    controller = controller or RateController()
+    stats = stats if stats is not None else new_stats(transport.clock)
+    pending = deque((local_path, remote_name, size, False) for local_path, remote_name, size in jobs)
+    partial = set()
+    while pending:
+        batch, total = take_batch(pending, controller.batch_size)
+        started = transport.clock()
+        error = run_copy(batch, transport, controller.timeout_for(total, len(batch)), partial)
+        seconds = transport.clock() - started
+        stats["busy"] += seconds
+        stats["batches"] += 1
+        if error is None:
+            controller.success(total, seconds, len(batch))
+            stats["files"] += len(batch)
+            stats["bytes"] += total
+            for local_path, remote_name, size, _ in batch:
+                yield local_path, remote_name, size, None
+        else:
+            controller.failure()
+            if len(batch) > 1:
+                transport.sleep(controller.delay)
+                stats["waited"] += controller.delay
+                remote = landed_files(transport)
+                retries = []
+                for local_path, remote_name, size, _ in batch:
+                    if remote is not None and remote.get(remote_name) == size:
+                        stats["files"] += 1
+                        stats["bytes"] += size
+                        yield local_path, remote_name, size, None
+                        continue
+                    if remote is not None and remote_name in remote:
+                        partial.add(remote_name)
+                    retries.append((local_path, remote_name, size, True))
+                stats["retries"] += len(retries)
+                pending.extendleft(reversed(retries))
+            else:
+                stats["failed"] += 1
+                local_path, remote_name, size, _ = batch[0]
+                yield local_path, remote_name, size, error
+        if pending:
+            transport.sleep(controller.delay)
+            stats["waited"] += controller.delay
+
+def print_stats(stats):
+    elapsed = max(stats["clock"]() - stats["started"], 1e-9)
+    print(f"Transferred {stats['files']} files, {stats['bytes'] / MIB:.1f} MB in {elapsed:.1f}s "
+          f"({stats['bytes'] / MIB / elapsed:.2f} MB/s, {stats['files'] * 60 / elapsed:.1f} files/min)")
+    print(f"  {stats['batches']} gio calls, {stats['retries']} retried singly, {stats['failed']} failed")
+    print(f"  {stats['busy']:.1f}s copying, {stats['waited']:.1f}s throttled")
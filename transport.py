@@ -0,0 +1,176 @@
+import os
+import time
+import random
+import shutil
+import subprocess
+import urllib.parse
+from pathlib import Path
+from settings import mtp_base
+from gio_listing import stream_listing
+
+BOOK_SUFFIXES = ('.epub', '.pdf')
+
+def run_gio(cmd, timeout=None):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"gio command timed out after {timeout:.0f}s: {' '.join(cmd)}")
+    if result.returncode != 0:
+        raise RuntimeError(f"gio command failed: {' '.join(cmd)}\nError: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+def list_remote_files(base=mtp_base):
+    counts = {}
+    files_by_name = {}
+    for entry in stream_listing(base, counts):
+        if entry.type != "directory" and entry.name.lower().endswith(BOOK_SUFFIXES):
+            files_by_name[entry.name] = entry.size
+    if counts.get("skipped"):
+        print(f'WARNING: Failed to parse {counts["skipped"]} lines from device listing')
+    return files_by_name
+
+def folder_stamp(base=mtp_base):
+    try:
+        out = run_gio(["gio", "info", "-a", "time::modified,time::modified-usec", base])
+    except (RuntimeError, OSError):
+        return None
+    fields = {}
+    for line in out.splitlines():
+        key, _, value = line.strip().partition(": ")
+        if key.startswith("time::"):
+            fields[key] = value
+    if "time::modified" not in fields:
+        return None
+    return f"{fields['time::modified']}.{fields.get('time::modified-usec', '0')}"
+
+class GioTransport:
+    def __init__(self, base=mtp_base):
+        self.base = base
+
+    def uri(self, name):
+        return self.base + urllib.parse.quote(name)
+
+    def list(self):
+        return list_remote_files(self.base)
+
+    def stamp(self):
+        return folder_stamp(self.base)
+
+    def stat(self, name):
+        try:
+            out = run_gio(["gio", "info", "-a", "standard::size", self.uri(name)])
+        except RuntimeError:
+            return None
+        for line in out.splitlines():
+            key, _, value = line.strip().partition(": ")
+            if key == "standard::size":
+                return int(value)
+        return None
+
+    def copy(self, local_path, name, timeout=None):
+        run_gio(["gio", "copy", str(local_path), self.uri(name)], timeout)
+
+    def copy_many(self, local_paths, timeout=None):
+        run_gio(["gio", "copy"] + [str(p) for p in local_paths] + [self.base], timeout)
+
+    def delete(self, name):
+        run_gio(["gio", "remove", self.uri(name)])
+
+    def clock(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class LocalTransport:
+    def __init__(self, folder, latency=0.0, file_latency=0.0, throughput=None, failure_rate=0.0, min_gap=0.0, overload_failure_rate=0.0, virtual_time=False, seed=None, refuse_overwrite=False, partial_failure_rate=0.0):
+        self.folder = Path(folder)
+        self.base = self.folder.resolve().as_uri() + "/"
+        self.latency = latency
+        self.file_latency = file_latency
+        self.throughput = throughput
+        self.failure_rate = failure_rate
+        self.min_gap = min_gap
+        self.overload_failure_rate = overload_failure_rate
+        self.virtual_time = virtual_time
+        self.refuse_overwrite = refuse_overwrite
+        self.partial_failure_rate = partial_failure_rate
+        self.random = random.Random(seed)
+        self.now = 0.0
+        self.last_call_end = None
+        self.calls = 0
+
+    def clock(self):
+        return self.now if self.virtual_time else time.monotonic()
+
+    def sleep(self, seconds):
+        if self.virtual_time:
+            self.now += seconds
+        else:
+            time.sleep(seconds)
+
+    def call(self, size=0, timeout=None, files=1):
+        self.calls += 1
+        cost = self.latency + files * self.file_latency + (size / self.throughput if self.throughput else 0.0)
+        start = self.clock()
+        overloaded = self.last_call_end is not None and start - self.last_call_end < self.min_gap
+        if timeout is not None and cost > timeout:
+            self.sleep(timeout)
+            self.last_call_end = self.clock()
+            raise RuntimeError(f"simulated timeout after {timeout:.0f}s")
+        self.sleep(cost)
+        self.last_call_end = self.clock()
+        chance = self.failure_rate + (self.overload_failure_rate if overloaded else 0.0)
+        if chance and self.random.random() < chance:
+            raise RuntimeError("simulated device error")
+
+    def list(self):
+        self.call()
+        files = {}
+        with os.scandir(self.folder) as iterator:
+            for entry in iterator:
+                if entry.is_file() and entry.name.lower().endswith(BOOK_SUFFIXES):
+                    files[entry.name] = entry.stat().st_size
+        return files
+
+    def stamp(self):
+        try:
+            return str(os.stat(self.folder).st_mtime_ns)
+        except OSError:
+            return None
+
+    def stat(self, name):
+        try:
+            self.call()
+            return os.stat(self.folder / name).st_size
+        except (RuntimeError, OSError):
+            return None
+
+    def copy(self, local_path, name, timeout=None):
+        self.copy_files([(local_path, name)], timeout)
+
+    def copy_many(self, local_paths, timeout=None):
+        self.copy_files([(p, os.path.basename(p)) for p in local_paths], timeout)
+
+    def copy_files(self, pairs, timeout):
+        try:
+            size = sum(os.path.getsize(local_path) for local_path, _ in pairs)
+        except OSError as e:
+            raise RuntimeError(f"copy failed: {e}")
+        self.call(size, timeout, len(pairs))
+        for local_path, name in pairs:
+            target = self.folder / name
+            if self.refuse_overwrite and target.exists():
+                raise RuntimeError(f"simulated device error: {name} already exists")
+            if self.partial_failure_rate and self.random.random() < self.partial_failure_rate:
+                with open(local_path, "rb") as src, open(target, "wb") as dst:
+                    dst.write(src.read(os.path.getsize(local_path) // 2))
+                raise RuntimeError(f"simulated device error: {name} left truncated")
+            shutil.copyfile(local_path, target)
+
+    def delete(self, name):
+        self.call()
+        try:
+            os.unlink(self.folder / name)
+        except OSError as e:
+            raise RuntimeError(f"delete failed: {e}")
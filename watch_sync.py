@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+import last_folder_helper
+import replace_changed
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+debounce_seconds = 2.0
+
+def load_libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+def add_watch(libc, fd, folder, watches):
+    wd = libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK)
+    if wd < 0:
+        err = ctypes.get_errno()
+        if err == errno.ENOSPC:
+            raise OSError(err, "inotify watch limit reached, raise fs.inotify.max_user_watches")
+        return None
+    watches[wd] = folder
+    return wd
+
+def watch_tree(libc, fd, root, watches):
+    found = []
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        add_watch(libc, fd, folder, watches)
+        try:
+            with os.scandir(folder) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        found.append(entry.path)
+        except OSError:
+            continue
+    return found
+
+def read_events(fd):
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return
+    offset = 0
+    while offset < len(data):
+        wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b"\0")
+        offset += length
+        yield wd, mask, os.fsdecode(name)
+
+def sync_batch(paths, dst):
+    existing = [Path(p) for p in sorted(paths) if os.path.isfile(p)]
+    if not existing:
+        return
+    counts = replace_changed.sync_paths(existing, dst)
+    print(f"Synced {len(existing)} changed files: {counts['copied']} created, {counts['replaced']} replaced, "
+          f"{counts['skipped']} identical, {counts['errors']} errors")
+
+def watch(src_dir, dst_dir):
+    if not sys.platform.startswith("linux"):
+        print("Watch mode needs Linux inotify")
+        return
+    src = Path(src_dir).expanduser().resolve()
+    dst = Path(dst_dir).expanduser().resolve()
+    libc = load_libc()
+    fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    watches = {}
+    try:
+        watch_tree(libc, fd, str(src), watches)
+        print("Running initial reconcile pass...")
+        replace_changed.smart_copy_flat(src, dst)
+        print(f"Watching {len(watches)} folders under {src} (Ctrl+C to stop)")
+        changed = {}
+        while True:
+            timeout = None
+            if changed:
+                timeout = max(0.0, min(changed.values()) + debounce_seconds - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], timeout)
+            now = time.monotonic()
+            if ready:
+                for wd, mask, name in read_events(fd):
+                    if mask & IN_Q_OVERFLOW:
+                        print("Event queue overflowed, rescanning source")
+                        for path in watch_tree(libc, fd, str(src), watches):
+                            changed[path] = now
+                        continue
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    folder = watches.get(wd)
+                    if folder is None or not name:
+                        continue
+                    path = os.path.join(folder, name)
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            for found in watch_tree(libc, fd, path, watches):
+                                changed[found] = now
+                        continue
+                    if mask & IN_MOVED_FROM:
+                        changed.pop(path, None)
+                        continue
+                    changed[path] = now
+            due = [path for path, stamp in changed.items() if now - stamp >= debounce_seconds]
+            if due:
+                for path in due:
+                    del changed[path]
+                sync_batch(due, dst)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        os.close(fd)
+
+if __name__ == "__main__":
+    source = input('Source: ')
+    default_destination = last_folder_helper.get_last_folder()
+    user_input = input(f"Destination ({default_destination}): ").strip()
+    destination_dir = user_input or default_destination
+    last_folder_helper.save_last_folder(destination_dir)
+    watch(source, destination_dir)